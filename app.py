@@ -1,6 +1,8 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 import json
-import requests
+import http_client
+from generation_cache import GenerationCache, flow_succeeded, get_generation_cache
+from singleflight import SingleFlight
 from config import (
     BASE_API_URL,
     LANGFLOW_ID,
@@ -12,8 +14,11 @@ from config import (
 
 app = Flask(__name__)
 
-def run_flow(message, endpoint=ENDPOINT or FLOW_ID, output_type="chat", 
-             input_type="chat", tweaks=TWEAKS, application_token=APPLICATION_TOKEN):
+# Identical concurrent flow calls (same message, flow and tweaks) share one upstream request
+flow_flight = SingleFlight()
+
+def build_flow_request(message, endpoint=ENDPOINT or FLOW_ID, output_type="chat",
+                       input_type="chat", tweaks=TWEAKS, application_token=APPLICATION_TOKEN):
     api_url = f"{BASE_API_URL}/lf/{LANGFLOW_ID}/api/v1/run/{endpoint}"
     payload = {
         "input_value": message,
@@ -25,18 +30,139 @@ def run_flow(message, endpoint=ENDPOINT or FLOW_ID, output_type="chat",
         payload["tweaks"] = tweaks
     if application_token:
         headers = {"Authorization": "Bearer " + application_token, "Content-Type": "application/json"}
+    return api_url, payload, headers
+
+def flow_cache_key(endpoint, output_type, input_type, tweaks):
+    """Model and tweaks arguments identifying a flow call in the generation cache."""
+    return f"langflow:{LANGFLOW_ID}/{endpoint}", {'tweaks': tweaks, 'input_type': input_type, 'output_type': output_type}
+
+def run_flow(message, endpoint=ENDPOINT or FLOW_ID, output_type="chat", 
+             input_type="chat", tweaks=TWEAKS, application_token=APPLICATION_TOKEN):
+    api_url, payload, headers = build_flow_request(
+        message, endpoint, output_type, input_type, tweaks, application_token
+    )
     
-    response = requests.post(api_url, json=payload, headers=headers)
+    def post():
+        response = http_client.post(api_url, json=payload, headers=headers)
+        raise_for_flow_status(response)
+        return response.json()
     
+    model, cache_tweaks = flow_cache_key(endpoint, output_type, input_type, tweaks)
+    return flow_flight.do(
+        GenerationCache.key(model, message, cache_tweaks),
+        lambda: get_generation_cache().get_or_generate(
+            model, message, post, tweaks=cache_tweaks, cacheable=flow_succeeded
+        )
+    )
+
+def raise_for_flow_status(response):
     if response.status_code != 200:
         raise ValueError(f"Failed to get a valid response. Status Code: {response.status_code}")
+
+def parse_flow_event(line):
+    """Decode one line of the Langflow streaming run response, or None for keep-alive blanks."""
+    if isinstance(line, bytes):
+        line = line.decode('utf-8')
+    line = line.strip()
+    if line.startswith('data:'):
+        line = line[len('data:'):].strip()
+    return json.loads(line) if line else None
+
+def flow_event_chunk(event):
+    """Return (text chunk, finished) for a streaming event; raise on flow errors.
     
-    return response.json()
+    When the model does not stream tokens, the final message comes with the end event.
+    """
+    name = event.get('event')
+    data = event.get('data') or {}
+    if name == 'token':
+        return data.get('chunk', ''), False
+    if name == 'error':
+        raise ValueError(data.get('error') or data.get('text') or 'Flow returned an error')
+    if name == 'end':
+        result = flow_result(data.get('result') or {})
+        return result.get('response', ''), True
+    return '', False
+
+def sse_event(data, event=None):
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+class FlowReplyStream:
+    """One streamed flow reply, shared by the Flask and Quart servers.
+    
+    cached holds a cached reply to serve instead of calling the flow. feed() turns
+    each streamed line into the chunk to forward, and close() caches the reply only
+    once the end event arrived, so a reply cut off mid-stream is never replayed.
+    """
+    
+    def __init__(self, message, endpoint, output_type, input_type, tweaks):
+        self.message = message
+        self.model, self.cache_tweaks = flow_cache_key(endpoint, output_type, input_type, tweaks)
+        cached = get_generation_cache().get(self.model, message, self.cache_tweaks)
+        self.cached = flow_result(cached)['response'] if flow_succeeded(cached) else None
+        self.parts = []
+        self.finished = False
+    
+    def feed(self, line):
+        """Return the text chunk to forward for one streamed line, '' if there is none."""
+        event = parse_flow_event(line)
+        if event is None:
+            return ''
+        chunk, self.finished = flow_event_chunk(event)
+        # The end event repeats the whole message; only use it if nothing was streamed
+        if not chunk or (self.finished and self.parts):
+            return ''
+        self.parts.append(chunk)
+        return chunk
+    
+    def close(self):
+        if self.finished and self.parts:
+            get_generation_cache().put(
+                self.model, self.message, {'messages': [{'message': ''.join(self.parts)}]}, self.cache_tweaks
+            )
+
+def stream_flow(message, endpoint=ENDPOINT or FLOW_ID, output_type="chat",
+                input_type="chat", tweaks=TWEAKS, application_token=APPLICATION_TOKEN):
+    """Yield the flow's reply in chunks as the Langflow run API streams it (stream=true)."""
+    reply = FlowReplyStream(message, endpoint, output_type, input_type, tweaks)
+    if reply.cached is not None:
+        yield reply.cached
+        return
+    
+    api_url, payload, headers = build_flow_request(
+        message, endpoint, output_type, input_type, tweaks, application_token
+    )
+    with http_client.post(api_url, params={'stream': 'true'}, json=payload, headers=headers, stream=True) as response:
+        raise_for_flow_status(response)
+        for line in response.iter_lines():
+            chunk = reply.feed(line)
+            if chunk:
+                yield chunk
+            if reply.finished:
+                break
+    
+    reply.close()
+
+def flow_result(response):
+    if 'messages' in response and response['messages']:
+        message_content = response['messages'][0].get('message', '')
+        return {'status': 'success', 'response': message_content}
+    else:
+        return {'status': 'error', 'message': 'No messages found in response'}
 
 @app.route('/')
 def home():
     return render_template('index.html')
 
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(get_generation_cache().stats())
+
+@app.route('/coalescing/stats')
+def coalescing_stats():
+    return jsonify(flow_flight.stats())
+
 @app.route('/process', methods=['POST'])
 def process_message():
     try:
@@ -45,14 +171,29 @@ def process_message():
         
         response = run_flow(message)
         
-        if 'messages' in response and response['messages']:
-            message_content = response['messages'][0].get('message', '')
-            return jsonify({'status': 'success', 'response': message_content})
-        else:
-            return jsonify({'status': 'error', 'message': 'No messages found in response'})
+        return jsonify(flow_result(response))
             
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
+@app.route('/process/stream', methods=['POST'])
+def process_message_stream():
+    data = request.json
+    message = data.get('message', '')
+    
+    def events():
+        try:
+            for chunk in stream_flow(message):
+                yield sse_event({'chunk': chunk})
+            yield sse_event({'status': 'success'}, event='end')
+        except Exception as e:
+            yield sse_event({'status': 'error', 'message': str(e)}, event='error')
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
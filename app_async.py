@@ -0,0 +1,190 @@
+import asyncio
+import os
+
+import httpx
+from quart import Quart, make_response, render_template, request, jsonify
+
+from app import FlowReplyStream, build_flow_request, flow_cache_key, flow_result, raise_for_flow_status, sse_event
+from config import FLOW_ID, ENDPOINT, TWEAKS
+from generation_cache import GenerationCache, flow_succeeded, get_generation_cache
+from singleflight import AsyncSingleFlight
+
+# Async serving mode for the /process Langflow proxy: requests await the upstream call
+# instead of holding a worker thread, so one process can serve hundreds of chats.
+# Run with `hypercorn app_async:app` (or `python app_async.py` for development).
+MAX_IN_FLIGHT = int(os.getenv('GATEWAY_MAX_IN_FLIGHT', 64))
+REQUEST_DEADLINE = float(os.getenv('GATEWAY_REQUEST_DEADLINE', 60))
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+
+app = Quart(__name__)
+
+metrics = {
+    'in_flight': 0,
+    'queue_depth': 0,
+    'max_queue_depth': 0,
+    'completed': 0,
+    'failed': 0,
+    'timed_out': 0
+}
+
+# Identical concurrent flow calls (same message, flow and tweaks) share one upstream request
+flow_flight = AsyncSingleFlight()
+
+
+@app.before_serving
+async def startup():
+    app.http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(REQUEST_DEADLINE, connect=CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=MAX_IN_FLIGHT, max_keepalive_connections=MAX_IN_FLIGHT)
+    )
+    app.flow_slots = asyncio.Semaphore(MAX_IN_FLIGHT)
+
+
+@app.after_serving
+async def shutdown():
+    await app.http_client.aclose()
+
+
+async def run_flow_async(message, endpoint=ENDPOINT or FLOW_ID, output_type="chat",
+                         input_type="chat", tweaks=TWEAKS):
+    api_url, payload, headers = build_flow_request(message, endpoint, output_type, input_type, tweaks)
+
+    async def post():
+        response = await app.http_client.post(api_url, json=payload, headers=headers)
+        raise_for_flow_status(response)
+        return response.json()
+
+    model, cache_tweaks = flow_cache_key(endpoint, output_type, input_type, tweaks)
+    return await flow_flight.do(
+        GenerationCache.key(model, message, cache_tweaks),
+        lambda: get_generation_cache().get_or_generate_async(
+            model, message, post, tweaks=cache_tweaks, cacheable=flow_succeeded
+        )
+    )
+
+
+async def stream_flow_async(message, endpoint=ENDPOINT or FLOW_ID, output_type="chat",
+                            input_type="chat", tweaks=TWEAKS):
+    reply = FlowReplyStream(message, endpoint, output_type, input_type, tweaks)
+    if reply.cached is not None:
+        yield reply.cached
+        return
+
+    api_url, payload, headers = build_flow_request(message, endpoint, output_type, input_type, tweaks)
+    async with app.http_client.stream(
+        'POST', api_url, params={'stream': 'true'}, json=payload, headers=headers
+    ) as response:
+        raise_for_flow_status(response)
+        async for line in response.aiter_lines():
+            chunk = reply.feed(line)
+            if chunk:
+                yield chunk
+            if reply.finished:
+                break
+
+    reply.close()
+
+
+@app.route('/')
+async def home():
+    return await render_template('index.html')
+
+
+@app.route('/metrics')
+async def gateway_metrics():
+    return jsonify(dict(metrics, max_in_flight=MAX_IN_FLIGHT, coalescing=flow_flight.stats()))
+
+
+@app.route('/process', methods=['POST'])
+async def process_message():
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + REQUEST_DEADLINE
+
+    # Time spent queueing for a slot counts against the request deadline
+    metrics['queue_depth'] += 1
+    metrics['max_queue_depth'] = max(metrics['max_queue_depth'], metrics['queue_depth'])
+    try:
+        await asyncio.wait_for(app.flow_slots.acquire(), timeout=REQUEST_DEADLINE)
+    except asyncio.TimeoutError:
+        metrics['timed_out'] += 1
+        return jsonify({'status': 'error', 'message': 'Server busy, please retry'}), 503
+    finally:
+        metrics['queue_depth'] -= 1
+
+    metrics['in_flight'] += 1
+    try:
+        data = await request.get_json()
+        message = data.get('message', '')
+
+        response = await asyncio.wait_for(run_flow_async(message), timeout=max(deadline - loop.time(), 0))
+        metrics['completed'] += 1
+
+        return jsonify(flow_result(response))
+
+    except asyncio.TimeoutError:
+        metrics['timed_out'] += 1
+        return jsonify({'status': 'error', 'message': 'Upstream flow did not respond in time'}), 504
+    except Exception as e:
+        metrics['failed'] += 1
+        return jsonify({'status': 'error', 'message': str(e)})
+    finally:
+        metrics['in_flight'] -= 1
+        app.flow_slots.release()
+
+
+@app.route('/process/stream', methods=['POST'])
+async def process_message_stream():
+    data = await request.get_json()
+    message = data.get('message', '')
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + REQUEST_DEADLINE
+
+    async def events():
+        # The slot is taken inside the body generator, so a client that disconnects
+        # before streaming starts never holds one
+        metrics['queue_depth'] += 1
+        metrics['max_queue_depth'] = max(metrics['max_queue_depth'], metrics['queue_depth'])
+        try:
+            await asyncio.wait_for(app.flow_slots.acquire(), timeout=max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            metrics['timed_out'] += 1
+            yield sse_event({'status': 'error', 'message': 'Server busy, please retry'}, event='error').encode('utf-8')
+            return
+        finally:
+            metrics['queue_depth'] -= 1
+
+        metrics['in_flight'] += 1
+        chunks = stream_flow_async(message)
+        try:
+            while True:
+                # Queueing and every chunk count against the request deadline
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    break
+                yield sse_event({'chunk': chunk}).encode('utf-8')
+            metrics['completed'] += 1
+            yield sse_event({'status': 'success'}, event='end').encode('utf-8')
+        except asyncio.TimeoutError:
+            metrics['timed_out'] += 1
+            yield sse_event({'status': 'error', 'message': 'Upstream flow did not respond in time'},
+                            event='error').encode('utf-8')
+        except Exception as e:
+            metrics['failed'] += 1
+            yield sse_event({'status': 'error', 'message': str(e)}, event='error').encode('utf-8')
+        finally:
+            await chunks.aclose()
+            metrics['in_flight'] -= 1
+            app.flow_slots.release()
+
+    response = await make_response(
+        events(),
+        {'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # events() enforces REQUEST_DEADLINE itself and reports it as an SSE error event
+    response.timeout = None
+    return response
+
+
+if __name__ == '__main__':
+    app.run(debug=True)
@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import re
+import time
+
+import pandas as pd
+
+from exports import typed_tweets_frame, write_json_atomic
+from last import TwitterAnalyzer
+from sources import FileReplaySource
+
+
+def load_checkpoint(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    write_json_atomic(path, checkpoint)
+
+
+def query_slug(query: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", query).strip("_")[:80] or "query"
+
+
+def backfill_query(analyzer: TwitterAnalyzer,
+                   query: str,
+                   checkpoint: dict,
+                   checkpoint_path: str,
+                   output_dir: str,
+                   limit: int,
+                   page_size: int = 100,
+                   save_to_astra: bool = True) -> int:
+    """
+    Fetch, score and store up to `limit` tweets for one query, resuming from its checkpoint.
+    The last page is stored whole, since the checkpoint resumes after it, so a query
+    can end up to 9 tweets over `limit`.
+
+    Each page is written to Astra and to its own Parquet part file before the
+    pagination cursor is checkpointed, so a crash re-fetches at most one page.
+
+    :return: The number of tweets written in this run
+    """
+    state = checkpoint.setdefault(query, {"next_token": None, "fetched": 0, "pages": 0, "done": False})
+    if state["done"] or state["fetched"] >= limit:
+        print(f"[{query}] already complete ({state['fetched']} tweets), skipping")
+        return 0
+
+    query_dir = os.path.join(output_dir, query_slug(query))
+    os.makedirs(query_dir, exist_ok=True)
+
+    written = 0
+    started = time.monotonic()
+    pages = analyzer.fetch_tweet_pages(query, limit - state["fetched"], page_size, next_token=state["next_token"])
+    for page, next_token in pages:
+        if save_to_astra:
+            result = analyzer.db_manager.save_tweets(page)
+            if result["errors"]:
+                print(f"[{query}] {len(result['errors'])} tweets failed to save to Astra")
+
+        typed_tweets_frame(pd.DataFrame(page)).to_parquet(
+            os.path.join(query_dir, f"part-{state['pages']:06d}.parquet"), index=False
+        )
+
+        state["pages"] += 1
+        state["fetched"] += len(page)
+        state["next_token"] = next_token
+        state["done"] = next_token is None
+        save_checkpoint(checkpoint_path, checkpoint)
+
+        written += len(page)
+        elapsed = time.monotonic() - started
+        print(f"[{query}] {state['fetched']}/{limit} tweets, {written / elapsed if elapsed else 0:.1f} tweets/sec")
+
+    if not written:
+        # The search yielded nothing past the checkpoint, so there is nothing left to page through
+        state["done"] = True
+        save_checkpoint(checkpoint_path, checkpoint)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="""Backfill scored tweets for one or more queries.
+Progress is checkpointed after every page; re-run the same command to resume after a crash.
+Run it like: python backfill.py "query one" "query two" --limit 10000""")
+    parser.add_argument("queries", type=str, nargs="*", help="Search queries to backfill")
+    parser.add_argument("--queries_file", type=str, default=None, help="File with one query per line")
+    parser.add_argument("--limit", type=int, default=10000, help="Maximum tweets per query")
+    parser.add_argument("--page_size", type=int, default=100, help="Tweets per search request (10-100)")
+    parser.add_argument("--checkpoint", type=str, default="backfill_checkpoint.json", help="Checkpoint file for cursors and progress")
+    parser.add_argument("--output_dir", type=str, default="backfill_output", help="Directory for Parquet part files")
+    parser.add_argument("--no_astra", action="store_true", help="Only write local Parquet files")
+    parser.add_argument("--replay", type=str, default=None, help="Replay an exported CSV/Parquet/Arrow file instead of calling the Twitter API")
+    parser.add_argument("--replay_rate", type=float, default=0, help="Replay speed in tweets/sec (0 = as fast as possible)")
+    parser.add_argument("--replay_loop", action="store_true", help="Loop the replay file until --limit is reached")
+
+    args = parser.parse_args()
+
+    queries = list(args.queries)
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as f:
+            queries.extend(line.strip() for line in f if line.strip())
+    if not queries:
+        parser.error("provide at least one query or --queries_file")
+
+    source = FileReplaySource(args.replay, rate=args.replay_rate, loop=args.replay_loop) if args.replay else None
+    analyzer = TwitterAnalyzer(source=source)
+    checkpoint = load_checkpoint(args.checkpoint)
+
+    total = 0
+    started = time.monotonic()
+    for query in queries:
+        total += backfill_query(
+            analyzer, query, checkpoint, args.checkpoint, args.output_dir,
+            args.limit, args.page_size, save_to_astra=not args.no_astra
+        )
+
+    elapsed = time.monotonic() - started
+    print(f"Backfill finished: {total} tweets in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f} tweets/sec)")
+
+
+if __name__ == "__main__":
+    main()
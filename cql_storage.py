@@ -0,0 +1,254 @@
+import heapq
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+from cassandra.auth import PlainTextAuthProvider
+from cassandra.cluster import EXEC_PROFILE_DEFAULT, Cluster, ExecutionProfile
+from cassandra.concurrent import execute_concurrent_with_args
+from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy
+from cassandra.query import dict_factory
+
+from storage import SENTIMENT_CATEGORIES, TweetStore
+
+# Stored tweet columns and their CQL types; anything else on a tweet dict is dropped
+COLUMNS = {
+    'id': 'text',
+    'text': 'text',
+    'created_at': 'text',
+    'created_ts': 'double',
+    'author_id': 'text',
+    'retweet_count': 'int',
+    'like_count': 'int',
+    'reply_count': 'int',
+    'engagement': 'int',
+    'sentiment_score': 'double',
+    'sentiment_category': 'text',
+    'analysis_timestamp': 'text'
+}
+
+SCHEMA = [
+    # Lookup and upsert by tweet id
+    "CREATE TABLE IF NOT EXISTS tweets ({columns}, PRIMARY KEY (id))",
+    # Time-range reads: one partition per category and UTC day, newest first
+    "CREATE TABLE IF NOT EXISTS tweets_by_day ({columns}, day text, "
+    "PRIMARY KEY ((sentiment_category, day), created_ts, id)) "
+    "WITH CLUSTERING ORDER BY (created_ts DESC, id ASC)",
+    # Which (category, day) partitions exist, so reads without a time range know where to look
+    "CREATE TABLE IF NOT EXISTS tweet_days (sentiment_category text, day text, "
+    "PRIMARY KEY (sentiment_category, day)) WITH CLUSTERING ORDER BY (day DESC)"
+]
+
+
+def connect(keyspace=None):
+    """Open a session on Astra (secure connect bundle) or on local contact points.
+
+    CASSANDRA_CONTACT_POINTS (comma separated) selects a local Cassandra/ScyllaDB,
+    e.g. a container, and creates the keyspace there if needed; otherwise the
+    bundle at ASTRA_SECURE_CONNECT_BUNDLE is used with ASTRA_TOKEN.
+    """
+    keyspace = keyspace or os.getenv('ASTRA_KEYSPACE', 'default_keyspace')
+    # Token-aware routing sends each prepared write straight to a replica of its partition
+    profile = ExecutionProfile(
+        load_balancing_policy=TokenAwarePolicy(DCAwareRoundRobinPolicy()),
+        row_factory=dict_factory
+    )
+    contact_points = os.getenv('CASSANDRA_CONTACT_POINTS')
+
+    if contact_points:
+        cluster = Cluster(
+            [host.strip() for host in contact_points.split(',')],
+            port=int(os.getenv('CASSANDRA_PORT', 9042)),
+            execution_profiles={EXEC_PROFILE_DEFAULT: profile}
+        )
+        session = cluster.connect()
+        session.execute(
+            f"CREATE KEYSPACE IF NOT EXISTS {keyspace} "
+            "WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 1}"
+        )
+    else:
+        cluster = Cluster(
+            cloud={'secure_connect_bundle': os.getenv('ASTRA_SECURE_CONNECT_BUNDLE', 'secure-connect-beerbros-art.zip')},
+            auth_provider=PlainTextAuthProvider('token', os.getenv('ASTRA_TOKEN')),
+            execution_profiles={EXEC_PROFILE_DEFAULT: profile}
+        )
+        session = cluster.connect()
+
+    session.set_keyspace(keyspace)
+    return session
+
+
+class CassandraTweetStore(TweetStore):
+    """Tweet storage over the Cassandra native protocol.
+
+    Writes are prepared statements executed concurrently (up to `concurrency` in
+    flight), so a page of tweets costs roughly one round trip instead of one per
+    document. Pass a session (returning rows as dicts, see connect) to reuse an
+    existing connection, e.g. to a local container, or to plug in a test double.
+    """
+
+    CONCURRENCY = 64
+
+    def __init__(self, session=None, concurrency=CONCURRENCY):
+        self.session = session or connect()
+        self.concurrency = concurrency
+        self._selects = {}
+
+        columns = ', '.join(f"{name} {cql_type}" for name, cql_type in COLUMNS.items())
+        for statement in SCHEMA:
+            self.session.execute(statement.format(columns=columns))
+
+        names = list(COLUMNS)
+        self._insert_tweet = self.session.prepare(
+            f"INSERT INTO tweets ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+        )
+        self._insert_by_day = self.session.prepare(
+            f"INSERT INTO tweets_by_day ({', '.join(names)}, day) VALUES ({', '.join('?' * (len(names) + 1))})"
+        )
+        self._insert_day = self.session.prepare(
+            "INSERT INTO tweet_days (sentiment_category, day) VALUES (?, ?)"
+        )
+        self._select_days = self.session.prepare(
+            "SELECT day FROM tweet_days WHERE sentiment_category = ?"
+        )
+
+    @classmethod
+    def prepare_document(cls, tweet):
+        document = super().prepare_document(tweet)
+        document.setdefault('created_ts', 0.0)
+        document = {name: document.get(name) for name in COLUMNS}
+        for name, cql_type in COLUMNS.items():
+            if document[name] is not None and cql_type == 'int':
+                document[name] = int(document[name])
+        return document
+
+    @staticmethod
+    def day(created_ts):
+        return datetime.fromtimestamp(created_ts, timezone.utc).strftime('%Y-%m-%d')
+
+    def save_tweets(self, tweets):
+        """Write tweets to the id and time-range tables; CQL inserts are upserts on id.
+
+        Returns {'inserted': count, 'errors': [{'id': tweet id, 'error': message}]}.
+        """
+        documents = list({tweet['id']: self.prepare_document(tweet) for tweet in tweets}.values())
+        result = {'inserted': 0, 'errors': []}
+        if not documents:
+            return result
+
+        rows = [tuple(document.values()) for document in documents]
+        days = [self.day(document['created_ts']) for document in documents]
+
+        tweet_results = self._execute_concurrent(self._insert_tweet, rows)
+        day_results = self._execute_concurrent(
+            self._insert_by_day, [row + (day,) for row, day in zip(rows, days)]
+        )
+        partitions = list({(document['sentiment_category'], day) for document, day in zip(documents, days)})
+        # Reads only visit partitions listed in tweet_days, so a failed entry fails every tweet in it
+        partition_errors = {
+            partition: error
+            for partition, (ok, error) in zip(partitions, self._execute_concurrent(self._insert_day, partitions))
+            if not ok
+        }
+
+        for document, day, (tweet_ok, tweet_error), (day_ok, day_error) in zip(documents, days, tweet_results, day_results):
+            partition_error = partition_errors.get((document['sentiment_category'], day))
+            if tweet_ok and day_ok and partition_error is None:
+                result['inserted'] += 1
+            else:
+                error = tweet_error if not tweet_ok else day_error if not day_ok else partition_error
+                result['errors'].append({'id': document['id'], 'error': str(error)})
+
+        if result['errors']:
+            print(f"Error saving {len(result['errors'])} of {len(documents)} tweets")
+        return result
+
+    def _execute_concurrent(self, statement, parameters, results_generator=False):
+        return execute_concurrent_with_args(
+            self.session, statement, parameters,
+            concurrency=self.concurrency,
+            raise_on_first_error=False,
+            results_generator=results_generator
+        )
+
+    def _select(self, fields, has_since, has_until):
+        key = (fields, has_since, has_until)
+        if key not in self._selects:
+            clauses = ["sentiment_category = ?", "day = ?"]
+            if has_since:
+                clauses.append("created_ts >= ?")
+            if has_until:
+                clauses.append("created_ts < ?")
+            self._selects[key] = self.session.prepare(
+                f"SELECT {', '.join(fields)} FROM tweets_by_day WHERE {' AND '.join(clauses)}"
+            )
+        return self._selects[key]
+
+    def _days(self, category, since, until):
+        first = self.day(since) if since is not None else None
+        last = self.day(until) if until is not None else None
+        return [row['day'] for row in self.session.execute(self._select_days, (category,))
+                if (first is None or row['day'] >= first) and (last is None or row['day'] <= last)]
+
+    def iter_tweets(self, query=None, fields=None, sort=None, page_size=TweetStore.READ_PAGE_SIZE, limit=None):
+        """Yield DataFrame chunks of up to page_size stored tweets matching query, newest first.
+
+        Each (category, day) partition in range is read with its own prepared query,
+        concurrently, and paged lazily by the driver. Score bounds are applied as rows
+        arrive. Sorting on numeric columns (e.g. {'engagement': -1}) happens client-side:
+        with a limit only the top `limit` rows are kept in memory while the matching
+        rows stream past, since no table is clustered by engagement.
+        """
+        query = query or self.build_query()
+        requested = [field for field in (fields or COLUMNS) if field in COLUMNS]
+        # Filter and sort columns are read even when not requested, then dropped
+        needed = set(requested)
+        if query['min_score'] is not None or query['max_score'] is not None:
+            needed.add('sentiment_score')
+        sort = {field: direction for field, direction in (sort or {}).items()
+                if COLUMNS.get(field) in ('int', 'double')}
+        needed.update(sort)
+        selected = tuple(field for field in COLUMNS if field in needed)
+
+        since, until = query['since'], query['until']
+        statement = self._select(selected, since is not None, until is not None)
+        statement.fetch_size = page_size
+        categories = [query['category']] if query['category'] else SENTIMENT_CATEGORIES
+        bounds = tuple(bound for bound in (since, until) if bound is not None)
+        parameters = [(category, day) + bounds for category in categories
+                      for day in self._days(category, since, until)]
+
+        def matching_rows():
+            for ok, rows in self._execute_concurrent(statement, parameters, results_generator=True):
+                if not ok:
+                    raise rows
+                for row in rows:
+                    score = row.get('sentiment_score')
+                    if query['min_score'] is not None and score < query['min_score']:
+                        continue
+                    if query['max_score'] is not None and score > query['max_score']:
+                        continue
+                    yield row
+
+        def sort_key(row):
+            return tuple(-(row.get(field) or 0) if direction < 0 else (row.get(field) or 0)
+                         for field, direction in sort.items())
+
+        if sort and limit:
+            rows = iter(heapq.nsmallest(limit, matching_rows(), key=sort_key))
+        elif sort:
+            rows = iter(sorted(matching_rows(), key=sort_key))
+        else:
+            rows = matching_rows()
+
+        buffer = []
+        for count, row in enumerate(rows, 1):
+            # Filter and sort columns that were not requested are dropped only now
+            buffer.append({field: row[field] for field in requested})
+            if len(buffer) >= page_size:
+                yield pd.DataFrame(buffer)
+                buffer = []
+            if limit and count >= limit:
+                break
+        if buffer:
+            yield pd.DataFrame(buffer)
@@ -1,7 +1,7 @@
-import requests
+import http_client
 
 # Test URL
 url = "https://api.langflow.astra.datastax.com/health"
-response = requests.get(url)
+response = http_client.get(url)
 print(f"Status Code: {response.status_code}")
 print(f"Response: {response.text}")
\ No newline at end of file
@@ -0,0 +1,91 @@
+import io
+import json
+import os
+
+import pandas as pd
+
+from storage import SENTIMENT_CATEGORIES
+
+ID_COLUMNS = ['id', 'author_id']
+COUNT_COLUMNS = ['retweet_count', 'like_count', 'reply_count']
+TIMESTAMP_COLUMNS = ['created_at', 'analysis_timestamp']
+
+EXPORT_FORMATS = {
+    'CSV': ('twitter_analysis.csv', 'text/csv'),
+    'Parquet': ('twitter_analysis.parquet', 'application/vnd.apache.parquet'),
+    'Arrow': ('twitter_analysis.arrow', 'application/vnd.apache.arrow.file')
+}
+
+
+def typed_tweets_frame(df):
+    """Return a copy of a tweets frame with proper dtypes.
+
+    Ids become int64, timestamps tz-aware UTC datetimes and sentiment_category a
+    categorical. Index columns leaked into older CSV exports are dropped.
+    """
+    leaked = [column for column in df.columns if column == '' or str(column).startswith('Unnamed:')]
+    df = df.drop(columns=leaked).reset_index(drop=True)
+
+    for column in ID_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column]).astype('int64')
+    for column in COUNT_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column]).fillna(0).astype('int64')
+    for column in TIMESTAMP_COLUMNS:
+        if column in df.columns:
+            # Naive timestamps (analysis_timestamp) are written in UTC
+            df[column] = pd.to_datetime(df[column], utc=True, format='ISO8601')
+    if 'sentiment_score' in df.columns:
+        df['sentiment_score'] = pd.to_numeric(df['sentiment_score']).astype('float64')
+    if 'sentiment_category' in df.columns:
+        df['sentiment_category'] = pd.Categorical(df['sentiment_category'], categories=SENTIMENT_CATEGORIES)
+    if 'text' in df.columns:
+        df['text'] = df['text'].astype(str)
+    return df
+
+
+def export_tweets(df, export_format):
+    """Serialize a tweets frame as CSV, Parquet or Arrow IPC bytes."""
+    if export_format == 'CSV':
+        return df.to_csv(index=False).encode('utf-8')
+
+    buffer = io.BytesIO()
+    typed = typed_tweets_frame(df)
+    if export_format == 'Parquet':
+        typed.to_parquet(buffer, index=False, engine='pyarrow')
+    elif export_format == 'Arrow':
+        typed.to_feather(buffer)
+    else:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    return buffer.getvalue()
+
+
+def load_tweets(source, name=None):
+    """Load an exported CSV, Parquet or Arrow file back into a typed tweets frame.
+
+    source is a path or a file-like object such as a Streamlit upload; the format
+    is taken from name (or the file's own name) by extension.
+    """
+    name = name or getattr(source, 'name', source)
+    extension = os.path.splitext(str(name))[1].lower()
+
+    if extension == '.parquet':
+        df = pd.read_parquet(source)
+    elif extension in ('.arrow', '.feather'):
+        df = pd.read_feather(source)
+    elif extension == '.csv':
+        # Keep ids as strings until typed_tweets_frame so they never pass through float
+        df = pd.read_csv(source, dtype={column: str for column in ID_COLUMNS}, encoding='utf-8-sig')
+    else:
+        raise ValueError(f"Unsupported file type: {name}")
+
+    return typed_tweets_frame(df)
+
+
+def write_json_atomic(path, data):
+    """Write data as JSON to path via a temporary file, so a crash never leaves a truncated file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
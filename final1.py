@@ -1,7 +1,9 @@
 import streamlit as st
 import json
 import requests
+import http_client
 from typing import Optional
+from generation_cache import flow_succeeded, get_generation_cache
 
 # Constants
 BASE_API_URL = "https://api.langflow.astra.datastax.com"
@@ -37,11 +39,18 @@ Please include:
         "Content-Type": "application/json"
     }
     
+    def post():
+        response = http_client.post(api_url, json=payload, headers=headers)
+        response.raise_for_status()  # Raise an exception for bad status codes
+        return response.json()
+    
     try:
         with st.spinner("Generating your ad..."):
-            response = requests.post(api_url, json=payload, headers=headers)
-            response.raise_for_status()  # Raise an exception for bad status codes
-            return response.json()
+            return get_generation_cache().get_or_generate(
+                f"langflow:{LANGFLOW_ID}/{endpoint}", prompt, post,
+                tweaks={'input_type': payload['input_type'], 'output_type': payload['output_type']},
+                cacheable=flow_succeeded
+            )
     except requests.exceptions.RequestException as e:
         st.error(f"API Error: {str(e)}")
         return None
@@ -1,9 +1,15 @@
 import argparse
+import csv
 import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from argparse import RawTextHelpFormatter
-import requests
-from typing import Optional
+import http_client
+from typing import Iterator, Optional, Tuple
 import warnings
+from generation_cache import flow_succeeded, get_generation_cache
 try:
     from langflow.load import upload_file
 except ImportError:
@@ -29,15 +35,28 @@ def run_flow(message: str,
              output_type: str = "chat",
              input_type: str = "chat",
              tweaks: Optional[dict] = None,
-             application_token: Optional[str] = None) -> dict:
+             application_token: Optional[str] = None,
+             use_cache: bool = True,
+             verbose: bool = False) -> dict:
     """
     Run a flow with a given message and optional tweaks.
 
     :param message: The message to send to the flow
     :param endpoint: The ID or the endpoint name of the flow
     :param tweaks: Optional tweaks to customize the flow
+    :param use_cache: Reuse a cached response for identical message, flow and tweaks
+    :param verbose: Print the request URL and the full response for debugging
     :return: The JSON response from the flow
     """
+    if use_cache:
+        return get_generation_cache().get_or_generate(
+            f"langflow:{LANGFLOW_ID}/{endpoint}", message,
+            lambda: run_flow(message, endpoint, output_type, input_type, tweaks, application_token,
+                             use_cache=False, verbose=verbose),
+            tweaks={'tweaks': tweaks, 'input_type': input_type, 'output_type': output_type},
+            cacheable=flow_succeeded
+        )
+
     api_url = f"{BASE_API_URL}/lf/{LANGFLOW_ID}/api/v1/run/{endpoint}"
     payload = {
         "input_value": message,
@@ -50,12 +69,14 @@ def run_flow(message: str,
     if application_token:
         headers = {"Authorization": "Bearer " + application_token, "Content-Type": "application/json"}
     
-    print(f"Sending request to {api_url}...")
-    response = requests.post(api_url, json=payload, headers=headers)
+    if verbose:
+        print(f"Sending request to {api_url}...")
+    response = http_client.post(api_url, json=payload, headers=headers)
     
-    # Print the response status code and content for debugging
-    print(f"Response Status Code: {response.status_code}")
-    print(f"Response Content: {response.text}")
+    if verbose:
+        # Print the response status code and content for debugging
+        print(f"Response Status Code: {response.status_code}")
+        print(f"Response Content: {response.text}")
     
     if response.status_code != 200:
         raise ValueError(f"Failed to get a valid response. Status Code: {response.status_code}")
@@ -63,11 +84,136 @@ def run_flow(message: str,
     return response.json()
 
 
+MESSAGE_FIELDS = ("message", "text", "body", "input_value")
+ID_FIELDS = ("id", "request_id")
+
+
+def read_batch(path: str,
+               message_field: Optional[str] = None,
+               id_field: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (id, message) pairs from a JSONL or CSV file.
+
+    :param path: A .jsonl file with one object per line, or a .csv file with a header row
+    :param message_field: The field holding the message; defaults to the first of MESSAGE_FIELDS present
+    :param id_field: The field holding a unique id; defaults to the first of ID_FIELDS present, else the row number
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+
+        for number, row in enumerate(rows, 1):
+            field = message_field or next((name for name in MESSAGE_FIELDS if row.get(name)), None)
+            if not field or not row.get(field):
+                print(f"Skipping row {number}: no message field")
+                continue
+            id_name = id_field or next((name for name in ID_FIELDS if row.get(name)), None)
+            yield str(row[id_name]) if id_name else str(number), str(row[field])
+
+
+def completed_ids(output_path: str) -> set:
+    """Return the ids recorded as successful in an output JSONL file; failed ids are retried."""
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, encoding="utf-8") as f:
+        rows = (json.loads(line) for line in f if line.strip())
+        return {row["id"] for row in rows if row.get("status") == "success"}
+
+
+class RateLimiter:
+    """Spaces calls evenly so that at most `rate` start per second across all threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        time.sleep(max(start - now, 0))
+
+
+def run_batch(batch_path: str,
+              output_path: str,
+              workers: int = 4,
+              rate: float = 0.0,
+              message_field: Optional[str] = None,
+              id_field: Optional[str] = None,
+              **flow_kwargs) -> dict:
+    """
+    Run every message in a JSONL/CSV file through run_flow with bounded concurrency.
+
+    Results are appended to output_path as JSONL in completion order, so an
+    interrupted batch resumes by skipping ids that already succeeded; failed ids
+    are run again and get a new row.
+
+    :param workers: Number of concurrent flow calls
+    :param rate: Maximum flow calls started per second (0 for no limit)
+    :param flow_kwargs: Passed through to run_flow
+    :return: Counts of succeeded, failed and skipped messages
+    """
+    done = completed_ids(output_path)
+    limiter = RateLimiter(rate)
+    counts = {"succeeded": 0, "failed": 0, "skipped": 0}
+    started = time.monotonic()
+
+    def process(record_id: str, message: str) -> dict:
+        limiter.wait()
+        call_started = time.monotonic()
+        try:
+            response = run_flow(message=message, **flow_kwargs)
+        except Exception as e:
+            return {"id": record_id, "status": "error", "error": str(e),
+                    "elapsed": time.monotonic() - call_started}
+        if not flow_succeeded(response):
+            return {"id": record_id, "status": "error", "error": "No messages found in response",
+                    "elapsed": time.monotonic() - call_started}
+        return {"id": record_id, "status": "success", "response": response["messages"][0].get("message", ""),
+                "elapsed": time.monotonic() - call_started}
+
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+
+        def drain(until: int):
+            nonlocal pending
+            while len(pending) > until:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    out.write(json.dumps(result) + "\n")
+                    out.flush()
+                    counts["succeeded" if result["status"] == "success" else "failed"] += 1
+
+        for record_id, message in read_batch(batch_path, message_field, id_field):
+            if record_id in done:
+                counts["skipped"] += 1
+                continue
+            done.add(record_id)
+            pending.add(executor.submit(process, record_id, message))
+            # Keep only a small window queued so huge inputs are streamed, not loaded
+            drain(workers * 2)
+        drain(0)
+
+    elapsed = time.monotonic() - started
+    processed = counts["succeeded"] + counts["failed"]
+    print(f"Batch finished: {counts['succeeded']} succeeded, {counts['failed']} failed, "
+          f"{counts['skipped']} skipped in {elapsed:.1f}s ({processed / elapsed if elapsed else 0:.2f} msg/s)")
+    return counts
+
+
 def main():
     parser = argparse.ArgumentParser(description="""Run a flow with a given message and optional tweaks.
-Run it like: python <your file>.py "your message here" --endpoint "your_endpoint" --tweaks '{"key": "value"}'""",
+Run it like: python <your file>.py "your message here" --endpoint "your_endpoint" --tweaks '{"key": "value"}'
+Or in batch: python <your file>.py --batch messages.jsonl --output results.jsonl --workers 8 --rate 5""",
                                      formatter_class=RawTextHelpFormatter)
-    parser.add_argument("message", type=str, help="The message to send to the flow")
+    parser.add_argument("message", type=str, nargs="?", help="The message to send to the flow")
     parser.add_argument("--endpoint", type=str, default=ENDPOINT or FLOW_ID, help="The ID or the endpoint name of the flow")
     parser.add_argument("--tweaks", type=str, help="JSON string representing the tweaks to customize the flow", default=json.dumps(TWEAKS))
     parser.add_argument("--application_token", type=str, default=APPLICATION_TOKEN, help="Application Token for authentication")
@@ -75,6 +221,14 @@ Run it like: python <your file>.py "your message here" --endpoint "your_endpoint
     parser.add_argument("--input_type", type=str, default="chat", help="The input type")
     parser.add_argument("--upload_file", type=str, help="Path to the file to upload", default=None)
     parser.add_argument("--components", type=str, help="Components to upload the file to", default=None)
+    parser.add_argument("--no-cache", action="store_true", help="Always call the flow instead of reusing a cached response")
+    parser.add_argument("--verbose", action="store_true", help="Print the request URL and the full response body")
+    parser.add_argument("--batch", type=str, default=None, help="JSONL or CSV file of messages to run instead of a single message")
+    parser.add_argument("--output", type=str, default="batch_results.jsonl", help="JSONL file batch results are appended to; ids already in it are skipped")
+    parser.add_argument("--workers", type=int, default=4, help="Number of concurrent flow calls in batch mode")
+    parser.add_argument("--rate", type=float, default=0.0, help="Maximum flow calls per second in batch mode (0 for no limit)")
+    parser.add_argument("--message_field", type=str, default=None, help="Batch field holding the message (default: first of message/text/body/input_value)")
+    parser.add_argument("--id_field", type=str, default=None, help="Batch field holding a unique id (default: id or request_id, else the row number)")
 
     args = parser.parse_args()
 
@@ -92,6 +246,26 @@ Run it like: python <your file>.py "your message here" --endpoint "your_endpoint
             raise ValueError("You need to provide the components to upload the file to.")
         tweaks = upload_file(file_path=args.upload_file, host=BASE_API_URL, flow_id=ENDPOINT, components=args.components, tweaks=tweaks)
 
+    if args.batch:
+        run_batch(
+            args.batch,
+            args.output,
+            workers=args.workers,
+            rate=args.rate,
+            message_field=args.message_field,
+            id_field=args.id_field,
+            endpoint=args.endpoint,
+            output_type=args.output_type,
+            input_type=args.input_type,
+            tweaks=tweaks,
+            application_token=args.application_token,
+            use_cache=not args.no_cache
+        )
+        return
+
+    if args.message is None:
+        parser.error("a message is required unless --batch is given")
+
     # Run the flow
     response = run_flow(
         message=args.message,
@@ -99,7 +273,9 @@ Run it like: python <your file>.py "your message here" --endpoint "your_endpoint
         output_type=args.output_type,
         input_type=args.input_type,
         tweaks=tweaks,
-        application_token=args.application_token
+        application_token=args.application_token,
+        use_cache=not args.no_cache,
+        verbose=args.verbose
     )
 
     # Check if the 'messages' field exists and is not empty
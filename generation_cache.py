@@ -0,0 +1,131 @@
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class GenerationCache:
+    """TTL- and size-bounded cache of LLM generations keyed on model, prompt and tweaks.
+
+    Entries live in SQLite, in memory by default or on disk when a path is given so
+    cached generations survive restarts. Least recently used entries are evicted
+    once more than maxsize are stored.
+    """
+
+    def __init__(self, path=None, ttl=24 * 3600, maxsize=1000):
+        self.path = path or ':memory:'
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS generations "
+            "(key TEXT PRIMARY KEY, value TEXT, created_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS generations_accessed_at ON generations (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(model, prompt, tweaks=None):
+        payload = json.dumps({'model': model, 'prompt': prompt, 'tweaks': tweaks}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, model, prompt, tweaks=None):
+        key = self.key(model, prompt, tweaks)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM generations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and (self.ttl is None or now - row[1] < self.ttl):
+                self._conn.execute("UPDATE generations SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self.hits += 1
+                return json.loads(row[0])
+
+            if row is not None:
+                self._conn.execute("DELETE FROM generations WHERE key = ?", (key,))
+                self._conn.commit()
+            self.misses += 1
+            return None
+
+    def put(self, model, prompt, value, tweaks=None):
+        key = self.key(model, prompt, tweaks)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO generations (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            self._conn.execute(
+                "DELETE FROM generations WHERE key IN "
+                "(SELECT key FROM generations ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,)
+            )
+            self._conn.commit()
+
+    def get_or_generate(self, model, prompt, generate, tweaks=None, cacheable=None):
+        """Return the cached generation, or call generate() and cache its result.
+
+        Only results passing cacheable (default: not None) are stored or served, so
+        failed generations are retried instead of replayed for the whole TTL.
+        """
+        cacheable = cacheable or _not_none
+        value = self._cached(model, prompt, tweaks, cacheable)
+        if value is None:
+            value = self._store(model, prompt, generate(), tweaks, cacheable)
+        return value
+
+    async def get_or_generate_async(self, model, prompt, generate, tweaks=None, cacheable=None):
+        """get_or_generate for a coroutine function generate, e.g. an httpx request."""
+        cacheable = cacheable or _not_none
+        value = self._cached(model, prompt, tweaks, cacheable)
+        if value is None:
+            value = self._store(model, prompt, await generate(), tweaks, cacheable)
+        return value
+
+    def _cached(self, model, prompt, tweaks, cacheable):
+        value = self.get(model, prompt, tweaks)
+        return value if value is not None and cacheable(value) else None
+
+    def _store(self, model, prompt, value, tweaks, cacheable):
+        if cacheable(value):
+            self.put(model, prompt, value, tweaks)
+        return value
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': size,
+            'maxsize': self.maxsize,
+            'ttl': self.ttl
+        }
+
+
+def _not_none(value):
+    return value is not None
+
+
+def flow_succeeded(response):
+    """Whether a Langflow run response carries a reply, i.e. is worth caching."""
+    return bool(response and response.get('messages'))
+
+
+@functools.lru_cache(maxsize=None)
+def get_generation_cache():
+    """Process-wide cache configured from GENERATION_CACHE_PATH/_TTL/_SIZE."""
+    return GenerationCache(
+        path=os.getenv('GENERATION_CACHE_PATH'),
+        ttl=float(os.getenv('GENERATION_CACHE_TTL', 24 * 3600)),
+        maxsize=int(os.getenv('GENERATION_CACHE_SIZE', 1000))
+    )
@@ -0,0 +1,76 @@
+import os
+import random
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 120))
+MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 3))
+BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', 0.5))
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 20))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class JitteredRetry(Retry):
+    """Retry with full-jitter exponential backoff, so concurrent clients do not retry in lockstep.
+
+    A Retry-After header on 429/503 responses still takes precedence over the backoff.
+    """
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff > 0 else 0
+
+
+def _build_session():
+    retry = JitteredRetry(
+        total=MAX_RETRIES,
+        # Only connection failures (nothing was sent) and RETRY_STATUSES are retried; a
+        # read timeout or dropped connection may mean a long generation is still running
+        # upstream, and resending it would repeat minutes of work
+        connect=MAX_RETRIES,
+        read=0,
+        other=0,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        # LLM and flow calls are POSTs; retrying them is safe for our read-only prompts
+        allowed_methods=None,
+        # Hand the last response back to the caller once retries run out
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session(url):
+    """Return the shared keep-alive session for the scheme and host of url."""
+    parts = urlsplit(url)
+    key = f"{parts.scheme}://{parts.netloc}"
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = _build_session()
+    return session
+
+
+def request(method, url, timeout=None, **kwargs):
+    """requests.request through the pooled session, with (connect, read) timeouts by default."""
+    return get_session(url).request(method, url, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs)
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
@@ -0,0 +1,85 @@
+from collections import defaultdict, deque
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over categorized keywords.
+
+    The automaton is compiled once, after which each text is scanned in a single
+    pass regardless of how many keywords there are. Matches only count on word
+    boundaries, so "false" does not match inside "falsehood".
+    """
+
+    def __init__(self, keyword_sets):
+        self.categories = list(keyword_sets)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for category, keywords in keyword_sets.items():
+            for keyword in keywords:
+                keyword = keyword.strip().lower()
+                if keyword:
+                    self._add(keyword, category)
+        self._build()
+
+    def _add(self, keyword, category):
+        node = 0
+        for char in keyword:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][char] = child
+            node = child
+        self._output[node].append((category, keyword))
+
+    def _build(self):
+        # Breadth-first so every failure link points at an already finished node
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    @staticmethod
+    def _is_boundary(text, index):
+        return index < 0 or index >= len(text) or not (text[index].isalnum() or text[index] == '_')
+
+    def find(self, text):
+        """Return {category: [(start, end, keyword), ...]} for every whole-word match."""
+        text = str(text)
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters expand when lowercased; keep offsets aligned with the input
+            lowered = ''.join(char.lower()[0] for char in text)
+
+        hits = defaultdict(list)
+        node = 0
+        for index, char in enumerate(lowered):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+
+            for category, keyword in self._output[node]:
+                start = index - len(keyword) + 1
+                if self._is_boundary(lowered, start - 1) and self._is_boundary(lowered, index + 1):
+                    hits[category].append((start, index + 1, keyword))
+        return dict(hits)
+
+    def find_batch(self, texts):
+        return [self.find(text) for text in texts]
+
+    def classify(self, text):
+        """Return the matched categories in configuration order."""
+        hits = self.find(text)
+        return [category for category in self.categories if category in hits]
+
+    def classify_batch(self, texts):
+        return [self.classify(text) for text in texts]
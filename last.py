@@ -1,24 +1,66 @@
 import streamlit as st
-import tweepy
 import pandas as pd
+import numpy as np
 import nltk
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
+import functools
+import hashlib
 import json
 import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dotenv import load_dotenv
 from astrapy.db import AstraDB
-import requests
-from collections import Counter
+import http_client
+from collections import Counter, OrderedDict
 import random
+from sentiment_cache import SentimentCache
+from keyword_matcher import KeywordMatcher
+from trending import TrendingTopicTracker
+from ngrams import TokenizedCorpus
+from generation_cache import get_generation_cache
+from exports import EXPORT_FORMATS, export_tweets, load_tweets
+from sources import FileReplaySource, SinceIdStore, TwitterSearchSource, get_twitter_client
+from storage import SENTIMENT_CATEGORIES, TweetStore
+from sqlite_storage import SQLiteTweetStore
+from write_behind import WriteBehindQueue
 
 # Load environment variables
 load_dotenv()
 
-class AstraDBManager:
-    def __init__(self):
+SENTIMENT_COLUMNS = ['compound', 'pos', 'neg', 'neu']
+
+@functools.lru_cache(maxsize=None)
+def get_sentiment_analyzer():
+    # Only go to the network when the lexicon is not installed yet
+    try:
+        nltk.data.find('sentiment/vader_lexicon.zip')
+    except LookupError:
+        nltk.download('vader_lexicon', quiet=True)
+    return SentimentIntensityAnalyzer()
+
+def _score_shard(texts):
+    # Runs in pool workers, each of which loads its own VADER lexicon once
+    sia = get_sentiment_analyzer()
+    return [sia.polarity_scores(text) for text in texts]
+
+class AstraDBManager(TweetStore):
+    # The Data API accepts at most 20 documents per insertMany call
+    INSERT_CHUNK_SIZE = 20
+    
+    def __init__(self, collection=None, chunk_size=INSERT_CHUNK_SIZE, max_workers=4, upsert=True):
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.upsert = upsert
+        
+        if collection is not None:
+            self.tweets_collection = collection
+            return
+        
         self.db = AstraDB(
             token=os.getenv('ASTRA_TOKEN'),
             api_endpoint=os.getenv('ASTRA_API_ENDPOINT'),
@@ -39,67 +81,371 @@ class AstraDBManager:
             print(f"Error connecting to Astra DB: {e}")
     
     def save_tweet(self, tweet_data):
+        if self.upsert:
+            return not self.save_tweets([tweet_data])['errors']
         try:
-            result = self.tweets_collection.insert_one(tweet_data)
+            result = self.tweets_collection.insert_one(self.prepare_document(tweet_data))
             return True
         except Exception as e:
             print(f"Error saving tweet: {e}")
             return False
     
-    def get_flagged_tweets(self):
+    def save_tweets(self, tweets):
+        """Write tweets in concurrent chunks, upserting on tweet id unless upsert is disabled.
+        
+        Returns {'inserted': count, 'errors': [{'id': tweet id, 'error': message}]}, plus
+        'updated'/'unchanged' counts in upsert mode; a failing document never aborts the
+        rest of the batch.
+        """
+        tweets = [self.prepare_document(tweet) for tweet in tweets]
+        if self.upsert:
+            # Keyed on the tweet id, so the last copy of a tweet within the batch wins
+            tweets = list({tweet['id']: dict(tweet, _id=tweet['id']) for tweet in tweets}.values())
+        
+        result = {'inserted': 0, 'errors': []}
+        if self.upsert:
+            result.update(updated=0, unchanged=0)
+        chunks = [tweets[i:i + self.chunk_size] for i in range(0, len(tweets), self.chunk_size)]
+        if not chunks:
+            return result
+        
+        write_chunk = self._upsert_chunk if self.upsert else self._insert_chunk_result
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+            for chunk_result in executor.map(write_chunk, chunks):
+                for key, value in chunk_result.items():
+                    result[key] += value
+        
+        if result['errors']:
+            print(f"Error saving {len(result['errors'])} of {len(tweets)} tweets")
+        return result
+    
+    def _insert_chunk_result(self, chunk):
+        inserted, errors = self._insert_chunk(chunk)
+        return {'inserted': inserted, 'errors': errors}
+    
+    def _upsert_chunk(self, chunk):
+        result = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'errors': []}
+        
         try:
-            cursor = self.tweets_collection.find({"sentiment_category": "negative"})
-            return pd.DataFrame(cursor)
+            response = self.tweets_collection.find(
+                {'_id': {'$in': [doc['_id'] for doc in chunk]}},
+                projection={field: 1 for field in self.MUTABLE_FIELDS}
+            )
+            existing = {doc['_id']: doc for doc in response['data']['documents']}
         except Exception as e:
-            print(f"Error retrieving flagged tweets: {e}")
-            return pd.DataFrame()
+            result['errors'].extend({'id': doc['id'], 'error': str(e)} for doc in chunk)
+            return result
+        
+        new_docs = []
+        for doc in chunk:
+            stored = existing.get(doc['_id'])
+            if stored is None:
+                new_docs.append(doc)
+                continue
+            
+            changes = {field: doc[field] for field in self.MUTABLE_FIELDS
+                       if field in doc and stored.get(field) != doc[field]}
+            if not changes:
+                result['unchanged'] += 1
+                continue
+            
+            changes['analysis_timestamp'] = doc.get('analysis_timestamp')
+            try:
+                self.tweets_collection.update_one({'_id': doc['_id']}, {'$set': changes})
+                result['updated'] += 1
+            except Exception as e:
+                result['errors'].append({'id': doc['id'], 'error': str(e)})
+        
+        if new_docs:
+            inserted, errors = self._insert_chunk(new_docs)
+            result['inserted'] += inserted
+            result['errors'].extend(errors)
+        return result
+    
+    def _insert_chunk(self, chunk):
+        inserted = 0
+        errors = []
+        remaining = chunk
+        
+        # Ordered inserts stop at the first failing document, so everything before it
+        # was written; record the failure and resume with the documents after it.
+        while remaining:
+            try:
+                response = self.tweets_collection.insert_many(
+                    remaining, options={'ordered': True}, partial_failures_allowed=True
+                )
+            except Exception as e:
+                errors.extend({'id': doc.get('id'), 'error': str(e)} for doc in remaining)
+                break
+            
+            done = len(response.get('status', {}).get('insertedIds', []))
+            inserted += done
+            if not response.get('errors') or done >= len(remaining):
+                break
+            
+            errors.append({
+                'id': remaining[done].get('id'),
+                'error': response['errors'][0].get('message', 'insert failed')
+            })
+            remaining = remaining[done + 1:]
+        
+        return inserted, errors
+    
+    def _data_api_filter(self, query):
+        query = query or self.build_query()
+        data_filter = {}
+        if query['category']:
+            data_filter['sentiment_category'] = query['category']
+        
+        for field, lower, upper, upper_operator in (
+            ('created_ts', query['since'], query['until'], '$lt'),
+            ('sentiment_score', query['min_score'], query['max_score'], '$lte')
+        ):
+            bounds = {}
+            if lower is not None:
+                bounds['$gte'] = lower
+            if upper is not None:
+                bounds[upper_operator] = upper
+            if bounds:
+                data_filter[field] = bounds
+        return data_filter
+    
+    def iter_tweets(self, query=None, fields=None, sort=None, page_size=TweetStore.READ_PAGE_SIZE, limit=None):
+        """Yield DataFrame chunks of up to page_size stored tweets matching query.
+        
+        Only the given fields are fetched, and server pages are followed lazily, so
+        callers that stop early (or pass limit) never read the whole collection. The
+        Data API only sorts within its first 10,000 matches.
+        """
+        data_filter = self._data_api_filter(query)
+        projection = {field: 1 for field in fields} if fields else None
+        options = {'limit': limit} if limit else {}
+        buffer = []
+        fetched = 0
+        page_state = None
+        
+        while True:
+            response = self.tweets_collection.find(
+                data_filter,
+                projection=projection,
+                sort=sort,
+                options=dict(options, pageState=page_state) if page_state else options
+            )
+            documents = response['data']['documents']
+            if limit:
+                documents = documents[:limit - fetched]
+            fetched += len(documents)
+            buffer.extend(documents)
+            
+            while len(buffer) >= page_size:
+                yield pd.DataFrame(buffer[:page_size])
+                buffer = buffer[page_size:]
+            
+            page_state = response['data'].get('nextPageState')
+            if not page_state or not documents or (limit and fetched >= limit):
+                break
+        
+        if buffer:
+            yield pd.DataFrame(buffer)
+
+@functools.lru_cache(maxsize=None)
+def get_db_manager():
+    # TWEET_STORE=cql writes over the Cassandra native protocol instead of the Data API,
+    # TWEET_STORE=sqlite to a local file that needs no network access
+    store = os.getenv('TWEET_STORE', 'astra')
+    if store == 'cql':
+        from cql_storage import CassandraTweetStore
+        return CassandraTweetStore()
+    if store == 'sqlite':
+        return SQLiteTweetStore(os.getenv('TWEET_STORE_PATH', 'tweets.db'))
+    return AstraDBManager()
+
+@functools.lru_cache(maxsize=None)
+def get_write_behind():
+    return WriteBehindQueue(
+        get_db_manager(),
+        maxsize=int(os.getenv('WRITE_BEHIND_QUEUE_SIZE', 10000)),
+        batch_size=int(os.getenv('WRITE_BEHIND_BATCH_SIZE', 100)),
+        dead_letter_path=os.getenv('WRITE_BEHIND_DEAD_LETTER', 'dead_letter.jsonl')
+    )
+
+@functools.lru_cache(maxsize=None)
+def get_since_id_store():
+    return SinceIdStore(os.getenv('SINCE_ID_STATE_PATH', 'since_ids.json'))
+
+@functools.lru_cache(maxsize=None)
+def get_sentiment_cache():
+    return SentimentCache(path=os.getenv('SENTIMENT_CACHE_PATH'))
 
 class TwitterAnalyzer:
-    def __init__(self):
-        self.client = tweepy.Client(
-            bearer_token=os.getenv('TWITTER_BEARER_TOKEN'),
-            consumer_key=os.getenv('TWITTER_API_KEY'),
-            consumer_secret=os.getenv('TWITTER_API_SECRET'),
-            access_token=os.getenv('TWITTER_ACCESS_TOKEN'),
-            access_token_secret=os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
-        )
+    ISSUE_KEYWORDS = {
+        'toxicity': ['hate', 'awful', 'terrible', 'worst', 'stupid'],
+        'misinformation': ['fake', 'hoax', 'conspiracy', 'false'],
+        'critical_issues': ['urgent', 'emergency', 'crisis', 'failure']
+    }
+    
+    def __init__(self, client=None, db_manager=None, sentiment_cache=None, issue_keywords=None, source=None, writer=None):
+        # The Twitter client, Astra connection and VADER lexicon are process-wide and
+        # only built on first use, so constructing an analyzer is cheap.
+        self._client = client
+        self._source = source
+        self._db_manager = db_manager
+        self._writer = writer
+        self.sentiment_cache = sentiment_cache or get_sentiment_cache()
+        self.issue_keywords = issue_keywords or self.ISSUE_KEYWORDS
+        self._issue_matcher = None
+        self.since_ids = get_since_id_store()
+    
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_twitter_client()
+        return self._client
+    
+    @property
+    def source(self):
+        # Live search by default; pass a FileReplaySource to run offline from an export
+        if self._source is None:
+            self._source = TwitterSearchSource(self._client)
+        return self._source
+    
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            self._db_manager = get_db_manager()
+        return self._db_manager
+    
+    @property
+    def writer(self):
+        # Tweets are persisted in the background so fetching never waits on storage
+        if self._writer is None:
+            self._writer = get_write_behind() if self._db_manager is None else WriteBehindQueue(self._db_manager)
+        return self._writer
+    
+    @property
+    def sia(self):
+        return get_sentiment_analyzer()
+    
+    @property
+    def issue_matcher(self):
+        if self._issue_matcher is None:
+            self._issue_matcher = KeywordMatcher(self.issue_keywords)
+        return self._issue_matcher
+    
+    def fetch_tweets(self, query, limit=100, on_page=None, source=None, since_id=None):
+        source = source or self.source
+        tweets = []
+        next_token = None
         
-        self.db_manager = AstraDBManager()
+        for page, next_token in self.fetch_tweet_pages(query, limit, source=source, since_id=since_id):
+            self.writer.submit(page)
+            tweets.extend(page)
+            if on_page:
+                on_page(page, len(tweets))
         
-        nltk.download('vader_lexicon')
-        self.sia = SentimentIntensityAnalyzer()
+        df = pd.DataFrame(tweets)
+        # A leftover next_token means the limit cut the results short: the search returns
+        # newest first, so tweets between since_id and these were not fetched and the
+        # stored id must not move past them
+        df.attrs['truncated'] = next_token is not None
+        if since_id is None or not df.attrs['truncated']:
+            self.since_ids.update(SinceIdStore.key(source, query), (tweet['id'] for tweet in tweets))
+        return df
     
-    def fetch_tweets(self, query, limit=100):
-        tweets = []
+    def refresh_tweets(self, query, previous, limit=100, on_page=None, source=None):
+        """Fetch only tweets newer than the previous dataset and merge them in.
         
-        response = self.client.search_recent_tweets(
-            query=query,
-            max_results=min(limit, 100),
-            tweet_fields=['created_at', 'public_metrics', 'author_id']
-        )
+        If more than limit new tweets arrived, the new tweets come back with
+        attrs['truncated'] set and the stored since_id is pinned to the start of the
+        gap, so the next refresh asks for the missed tweets again.
         
-        if response.data:
-            for tweet in response.data:
-                sentiment = self.analyze_sentiment(tweet.text)
-                tweet_data = {
-                    'id': str(tweet.id),
-                    'text': tweet.text,
-                    'created_at': tweet.created_at.isoformat(),
-                    'author_id': str(tweet.author_id),
-                    'retweet_count': tweet.public_metrics['retweet_count'],
-                    'like_count': tweet.public_metrics['like_count'],
-                    'reply_count': tweet.public_metrics['reply_count'],
-                    'sentiment_score': sentiment['compound'],
-                    'sentiment_category': self.get_sentiment_category(sentiment['compound']),
-                    'analysis_timestamp': datetime.utcnow().isoformat()
-                }
-                tweets.append(tweet_data)
-                self.db_manager.save_tweet(tweet_data)
-            
-        return pd.DataFrame(tweets)
+        Returns (merged, new tweets); the new tweets come first in merged, so
+        summarize(merged, previous=previous) only aggregates the delta.
+        """
+        source = source or self.source
+        if previous is None or previous.empty:
+            delta = self.fetch_tweets(query, limit, on_page, source)
+            return delta, delta
+        
+        # Never ask for more than the previous dataset holds, or tweets in between would be skipped
+        since_id = int(pd.to_numeric(previous['id']).max())
+        stored = self.since_ids.get(SinceIdStore.key(source, query))
+        if stored is not None:
+            since_id = min(since_id, int(stored))
+        
+        delta = self.fetch_tweets(query, limit, on_page, source, since_id=since_id)
+        if delta.attrs['truncated']:
+            # The merged dataset now reaches past the gap, so remember where the gap starts
+            self.since_ids.set(SinceIdStore.key(source, query), since_id)
+        if delta.empty:
+            return previous, delta
+        
+        merged = pd.concat([delta, previous], ignore_index=True)
+        merged = merged[~merged['id'].astype(str).duplicated()].reset_index(drop=True)
+        return merged, delta
+    
+    def fetch_tweet_pages(self, query, limit=100, page_size=TwitterSearchSource.MAX_PAGE_SIZE, next_token=None,
+                          source=None, since_id=None):
+        """Yield (scored tweets, next_token) per source page, following next_token up to limit."""
+        source = source or self.source
+        
+        for records, next_token in source.pages(query, limit, page_size, next_token, since_id=since_id):
+            scores = self.score_texts([record['text'] for record in records])
+            page = [self.build_tweet_data(record, compound, category)
+                    for record, compound, category
+                    in zip(records, scores['compound'], scores['sentiment_category'])]
+            yield page, next_token
+    
+    def build_tweet_data(self, record, compound, category):
+        return dict(
+            record,
+            sentiment_score=float(compound),
+            sentiment_category=str(category),
+            analysis_timestamp=datetime.utcnow().isoformat()
+        )
     
     def analyze_sentiment(self, text):
-        return self.sia.polarity_scores(text)
+        return self.sentiment_cache.get_or_score(text, self.sia.polarity_scores)
+    
+    def score_texts(self, texts, processes=None, shard_size=5000):
+        """Score a batch of texts with VADER.
+        
+        Returns a DataFrame with compound/pos/neg/neu columns and a categorical
+        sentiment_category, aligned with the index of a Series input. With processes
+        set, batches larger than shard_size are split across a process pool.
+        """
+        index = texts.index if isinstance(texts, pd.Series) else None
+        texts = [str(text) for text in texts]
+        
+        rows = [[scores[column] for column in SENTIMENT_COLUMNS]
+                for scores in self.sentiment_cache.score_many(
+                    texts, lambda uncached: self._score_uncached(uncached, processes, shard_size)
+                )]
+        
+        scores = pd.DataFrame(
+            np.array(rows, dtype=float).reshape(-1, len(SENTIMENT_COLUMNS)),
+            columns=SENTIMENT_COLUMNS,
+            index=index
+        )
+        scores['sentiment_category'] = self.categorize_scores(scores['compound'])
+        return scores
+    
+    def _score_uncached(self, texts, processes, shard_size):
+        if processes and len(texts) > shard_size:
+            shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                return [scores for shard in executor.map(_score_shard, shards) for scores in shard]
+        return [self.sia.polarity_scores(text) for text in texts]
+    
+    @staticmethod
+    def categorize_scores(compound_scores):
+        compound_scores = np.asarray(compound_scores, dtype=float)
+        labels = np.select(
+            [compound_scores >= 0.05, compound_scores <= -0.05],
+            ['positive', 'negative'],
+            default='neutral'
+        )
+        return pd.Categorical(labels, categories=SENTIMENT_CATEGORIES)
     
     def get_sentiment_category(self, compound_score):
         if compound_score >= 0.05:
@@ -110,24 +456,18 @@ class TwitterAnalyzer:
             return 'neutral'
     
     def analyze_content_issues(self, text):
-        text_lower = text.lower()
-        issues = []
-        
-        toxic_keywords = ['hate', 'awful', 'terrible', 'worst', 'stupid']
-        misinfo_keywords = ['fake', 'hoax', 'conspiracy', 'false']
-        critical_keywords = ['urgent', 'emergency', 'crisis', 'failure']
-        
-        if any(word in text_lower for word in toxic_keywords):
-            issues.append('toxicity')
-        if any(word in text_lower for word in misinfo_keywords):
-            issues.append('misinformation')
-        if any(word in text_lower for word in critical_keywords):
-            issues.append('critical_issues')
-            
-        return issues if issues else ['general_negative']
+        return self.analyze_content_issues_batch([text])[0]
+    
+    def analyze_content_issues_batch(self, texts):
+        return [issues or ['general_negative'] for issues in self.issue_matcher.classify_batch(texts)]
+    
+    def find_content_issues(self, texts):
+        """Return per-text {issue: [(start, end, keyword), ...]} keyword hit positions."""
+        return self.issue_matcher.find_batch(texts)
     
-    def generate_damage_control_suggestions(self, tweet):
-        issues = self.analyze_content_issues(tweet['text'])
+    def generate_damage_control_suggestions(self, tweet, issues=None):
+        if issues is None:
+            issues = self.analyze_content_issues(tweet['text'])
         
         suggestions = {
             'toxicity': [
@@ -155,7 +495,17 @@ class TwitterAnalyzer:
         return [suggestion for issue in issues for suggestion in suggestions.get(issue, [])]
 
 class AdGenerator:
-    def __init__(self):
+    BENEFIT_TRIGGERS = {'great', 'amazing', 'excellent', 'best', 'love', 'perfect'}
+    PAIN_POINT_TRIGGERS = {'bad', 'poor', 'terrible', 'worst', 'hate', 'difficult', 'problem'}
+    
+    def __init__(self, benefit_triggers=None, pain_point_triggers=None, ngram_size=2):
+        self.benefit_triggers = set(benefit_triggers or self.BENEFIT_TRIGGERS)
+        self.pain_point_triggers = set(pain_point_triggers or self.PAIN_POINT_TRIGGERS)
+        self.ngram_size = ngram_size
+        # (key, corpus) as one tuple: the generator is shared across sessions, so the
+        # pair is swapped atomically and a session never sees another's key with its corpus
+        self._tokenized = (None, None)
+        
         self.positive_templates = [
             "Experience what everyone's talking about! {benefit}",
             "Join the conversation! {benefit}",
@@ -172,46 +522,41 @@ class AdGenerator:
             "Time for an upgrade? Discover how we {solution}"
         ]
     
-    def analyze_trending_topics(self, tweets_df):
-        all_text = ' '.join(tweets_df['text'].astype(str))
-        
-        common_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'is', 'are'}
-        words = [word.lower() for word in all_text.split() 
-                if word.lower() not in common_words and len(word) > 3]
-        
-        word_freq = Counter(words)
-        trending_topics = [word for word, count in word_freq.most_common(5)]
-        return trending_topics
+    def tokenize(self, tweets_df):
+        """Tokenize the texts once; repeated calls on the same texts reuse the tokens."""
+        key = hashlib.sha1(
+            pd.util.hash_pandas_object(tweets_df['text'].astype(str)).to_numpy().tobytes()
+        ).hexdigest()
+        cached_key, corpus = self._tokenized
+        if key != cached_key:
+            corpus = TokenizedCorpus(tweets_df['text'])
+            self._tokenized = (key, corpus)
+        return corpus
     
-    def extract_key_benefits(self, positive_tweets_df):
-        positive_words = []
-        for text in positive_tweets_df['text']:
-            words = str(text).lower().split()
-            for i, word in enumerate(words):
-                if word in {'great', 'amazing', 'excellent', 'best', 'love', 'perfect'}:
-                    if i + 1 < len(words):
-                        positive_words.append(words[i + 1])
-        
+    def analyze_trending_topics(self, tweets_df, corpus=None):
+        corpus = corpus or self.tokenize(tweets_df)
+        tracker = TrendingTopicTracker(capacity=None)
+        tracker.update_tokens(corpus.all_tokens(subset=tweets_df.index))
+        return tracker.top(5)
+    
+    def extract_key_benefits(self, positive_tweets_df, corpus=None):
+        corpus = corpus or self.tokenize(positive_tweets_df)
+        positive_words = corpus.following(self.benefit_triggers, self.ngram_size, subset=positive_tweets_df.index)
         return Counter(positive_words).most_common(5)
     
-    def identify_pain_points(self, negative_tweets_df):
-        pain_points = []
-        for text in negative_tweets_df['text']:
-            words = str(text).lower().split()
-            for i, word in enumerate(words):
-                if word in {'bad', 'poor', 'terrible', 'worst', 'hate', 'difficult', 'problem'}:
-                    if i + 1 < len(words):
-                        pain_points.append(words[i + 1])
-        
+    def identify_pain_points(self, negative_tweets_df, corpus=None):
+        corpus = corpus or self.tokenize(negative_tweets_df)
+        pain_points = corpus.following(self.pain_point_triggers, self.ngram_size, subset=negative_tweets_df.index)
         return Counter(pain_points).most_common(5)
     
-    def generate_ad_ideas(self, tweets_df):
-        positive_tweets = tweets_df[tweets_df['sentiment_score'] > 0.2]
-        negative_tweets = tweets_df[tweets_df['sentiment_score'] < -0.2]
-        
-        trending = self.analyze_trending_topics(tweets_df)
-        benefits = self.extract_key_benefits(positive_tweets)
-        pain_points = self.identify_pain_points(negative_tweets)
+    def generate_ad_ideas(self, tweets_df, trending=None, benefits=None, pain_points=None):
+        corpus = self.tokenize(tweets_df)
+        if trending is None:
+            trending = self.analyze_trending_topics(tweets_df, corpus)
+        if benefits is None:
+            benefits = self.extract_key_benefits(tweets_df[tweets_df['sentiment_score'] > 0.2], corpus)
+        if pain_points is None:
+            pain_points = self.identify_pain_points(tweets_df[tweets_df['sentiment_score'] < -0.2], corpus)
         
         ad_ideas = []
         
@@ -266,8 +611,9 @@ class CreativeAssetGenerator:
         '''
 
 class OllamaAdGenerator:
-    def __init__(self, base_url="http://localhost:11434"):
+    def __init__(self, base_url="http://localhost:11434", model="llama2:3.2"):
         self.base_url = base_url
+        self.model = model
     
     def generate_ad_prompt(self, company_info, sentiment_data):
         avg_sentiment = sentiment_data['sentiment_score'].mean()
@@ -303,11 +649,14 @@ class OllamaAdGenerator:
         return prompt
 
     def generate_ad(self, prompt):
+        return get_generation_cache().get_or_generate(self.model, prompt, lambda: self._generate_ad(prompt))
+    
+    def _generate_ad(self, prompt):
         try:
-            response = requests.post(
+            response = http_client.post(
                 f"{self.base_url}/api/generate",
                 json={
-                    "model": "llama2:3.2",
+                    "model": self.model,
                     "prompt": prompt,
                     "stream": False
                 }
@@ -318,30 +667,204 @@ class OllamaAdGenerator:
         except Exception as e:
             print(f"Error generating ad with Ollama: {e}")
             return None
+    
+    def generate_ad_stream(self, prompt, stats=None):
+        """Yield ad copy deltas from Ollama's NDJSON stream as they are generated.
+        
+        Once the stream completes, the caller's stats dict is filled with the time to
+        first token and the generation rate in tokens/sec. The generator is shared
+        across sessions, so the stats are not kept on it.
+        """
+        stats = {} if stats is None else stats
+        started = time.perf_counter()
+        cache = get_generation_cache()
+        cached = cache.get(self.model, prompt)
+        if cached is not None:
+            yield cached
+            stats.update({
+                'time_to_first_token': time.perf_counter() - started,
+                'total_time': time.perf_counter() - started,
+                'tokens': None,
+                'tokens_per_second': None,
+                'cached': True
+            })
+            return
+        
+        first_token_at = None
+        deltas = 0
+        parts = []
+        final_chunk = {}
+        
+        with http_client.post(
+            f"{self.base_url}/api/generate",
+            json={
+                "model": self.model,
+                "prompt": prompt,
+                "stream": True
+            },
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    raise RuntimeError(chunk['error'])
+                
+                delta = chunk.get('response', '')
+                if delta:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    deltas += 1
+                    parts.append(delta)
+                    yield delta
+                
+                if chunk.get('done'):
+                    final_chunk = chunk
+                    break
+        
+        finished = time.perf_counter()
+        # Prefer Ollama's own eval counters; fall back to wall-clock over received deltas
+        tokens = final_chunk.get('eval_count', deltas)
+        if final_chunk.get('eval_duration'):
+            tokens_per_second = tokens / (final_chunk['eval_duration'] / 1e9)
+        elif first_token_at is not None and finished > first_token_at:
+            tokens_per_second = tokens / (finished - first_token_at)
+        else:
+            tokens_per_second = 0.0
+        
+        stats.update({
+            'time_to_first_token': first_token_at - started if first_token_at is not None else None,
+            'total_time': finished - started,
+            'tokens': tokens,
+            'tokens_per_second': tokens_per_second,
+            'cached': False
+        })
+        # A stream that ends without the done chunk was cut off; don't replay it as a finished ad
+        if parts and final_chunk.get('done'):
+            cache.put(self.model, prompt, ''.join(parts))
 
-class EnhancedTwitterAnalyzer(TwitterAnalyzer):
-    def __init__(self):
-        super().__init__()
-        self.ad_generator = AdGenerator()
-        self.ollama_generator = OllamaAdGenerator()
+FINGERPRINT_COLUMNS = ['id', 'text', 'sentiment_score', 'retweet_count', 'like_count', 'reply_count']
+
+def dataset_fingerprint(df):
+    columns = [column for column in FINGERPRINT_COLUMNS if column in df.columns]
+    row_hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+class SentimentSummary:
+    """Everything the dashboard tabs derive from one dataset, computed once per version."""
     
-    def get_sentiment_summary(self, df):
+    def __init__(self, df, ad_generator, trending=None, previous=None):
+        self.fingerprint = dataset_fingerprint(df)
+        self.row_count = len(df)
+        
+        if previous is None:
+            masks = self.category_masks(df)
+            self.metrics = self.compute_metrics(df, *masks)
+        else:
+            # df is new rows followed by the previous dataset, so only the new rows are aggregated
+            delta = df.iloc[:len(df) - previous.row_count]
+            delta_masks = self.category_masks(delta)
+            previous_masks = (previous.positive_mask, previous.negative_mask, previous.neutral_mask)
+            masks = [np.concatenate([new, old]) for new, old in zip(delta_masks, previous_masks)]
+            self.metrics = self.merge_metrics(previous.metrics, self.compute_metrics(delta, *delta_masks))
+        self.positive_mask, self.negative_mask, self.neutral_mask = masks
+        
+        corpus = ad_generator.tokenize(df)
+        self.trending_topics = trending if trending is not None else ad_generator.analyze_trending_topics(df, corpus)
+        self.key_benefits = ad_generator.extract_key_benefits(df[self.positive_mask], corpus)
+        self.pain_points = ad_generator.identify_pain_points(df[self.negative_mask], corpus)
+        # Ad ideas draw on strongly polarised tweets rather than the category split
+        self.ad_benefits = ad_generator.extract_key_benefits(df[df['sentiment_score'] > 0.2], corpus)
+        self.ad_pain_points = ad_generator.identify_pain_points(df[df['sentiment_score'] < -0.2], corpus)
+    
+    @staticmethod
+    def category_masks(df):
+        positive = (df['sentiment_category'] == 'positive').to_numpy()
+        negative = (df['sentiment_category'] == 'negative').to_numpy()
+        return positive, negative, ~(positive | negative)
+    
+    @staticmethod
+    def compute_metrics(df, positive_mask, negative_mask, neutral_mask):
+        return {
+            'average_sentiment': float(df['sentiment_score'].mean()) if len(df) else 0.0,
+            'positive_count': int(positive_mask.sum()),
+            'negative_count': int(negative_mask.sum()),
+            'neutral_count': int(neutral_mask.sum()),
+            'total_retweets': int(df['retweet_count'].sum()),
+            'total_likes': int(df['like_count'].sum()),
+            'total_replies': int(df['reply_count'].sum())
+        }
+    
+    @staticmethod
+    def merge_metrics(old, new):
+        counts = ('positive_count', 'negative_count', 'neutral_count')
+        old_rows = sum(old[key] for key in counts)
+        new_rows = sum(new[key] for key in counts)
+        total = old_rows + new_rows
+        average = (old['average_sentiment'] * old_rows + new['average_sentiment'] * new_rows) / total if total else 0.0
+        return {key: average if key == 'average_sentiment' else old[key] + new[key] for key in old}
+    
+    def as_dict(self, df):
         return {
             'sentiment_score': df['sentiment_score'],
-            'trending_topics': self.ad_generator.analyze_trending_topics(df),
-            'key_benefits': self.ad_generator.extract_key_benefits(
-                df[df['sentiment_category'] == 'positive']
-            ),
-            'pain_points': self.ad_generator.identify_pain_points(
-                df[df['sentiment_category'] == 'negative']
-            )
+            'trending_topics': self.trending_topics,
+            'key_benefits': self.key_benefits,
+            'pain_points': self.pain_points
         }
 
+class EnhancedTwitterAnalyzer(TwitterAnalyzer):
+    SUMMARY_CACHE_SIZE = 8
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.ad_generator = AdGenerator()
+        self.ollama_generator = OllamaAdGenerator()
+        self._summaries = OrderedDict()
+        self._summaries_lock = threading.Lock()
+    
+    def summarize(self, df, trending=None, previous=None):
+        """Return the SentimentSummary for df, reusing it while the data is unchanged.
+        
+        previous is the dataset df was refreshed from (see refresh_tweets); when its
+        summary is cached, the metrics are updated from the new rows only.
+        """
+        fingerprint = dataset_fingerprint(df)
+        previous_fingerprint = None
+        if previous is not None and 0 < len(previous) <= len(df):
+            previous_fingerprint = dataset_fingerprint(previous)
+        with self._summaries_lock:
+            summary = self._summaries.get(fingerprint)
+            if summary is not None:
+                self._summaries.move_to_end(fingerprint)
+                return summary
+            previous_summary = self._summaries.get(previous_fingerprint)
+        
+        # Only valid when previous is exactly the tail of df
+        if previous_summary is not None and \
+                dataset_fingerprint(df.iloc[len(df) - len(previous):]) != previous_summary.fingerprint:
+            previous_summary = None
+        
+        summary = SentimentSummary(df, self.ad_generator, trending, previous_summary)
+        with self._summaries_lock:
+            self._summaries[fingerprint] = summary
+            while len(self._summaries) > self.SUMMARY_CACHE_SIZE:
+                self._summaries.popitem(last=False)
+        return summary
+    
+    def get_sentiment_summary(self, df, trending=None):
+        return self.summarize(df, trending).as_dict(df)
+
+@st.cache_resource
+def get_analyzer():
+    return EnhancedTwitterAnalyzer()
+
 def main():
     st.set_page_config(page_title="ART", layout="wide")
     st.title("ART WITH DAMAGE CONTROL AND AI-POWERED AD GENERATION")
     
-    analyzer = EnhancedTwitterAnalyzer()
+    analyzer = get_analyzer()
     
     with st.sidebar:
         st.header("Configuration")
@@ -361,21 +884,78 @@ def main():
         }
         
         query = st.text_input("Enter search query:")
-        limit = st.number_input("Number of tweets to analyze:", min_value=10, max_value=100, value=50)
+        limit = st.number_input("Number of tweets to analyze:", min_value=10, max_value=100000, value=50, step=10)
+        
+        # Replay streams an earlier export through the same scoring pipeline without API calls
+        source_kind = st.radio("Data source", ["Live Twitter", "Replay file"], horizontal=True)
+        source = None
+        if source_kind == "Replay file":
+            replay_path = st.text_input("Replay file path", "twitter_analysis.csv")
+            replay_rate = st.number_input("Replay rate (tweets/sec, 0 = as fast as possible)", min_value=0, value=0, step=10)
+            replay_loop = st.checkbox("Loop replay until the tweet limit is reached")
+            source = FileReplaySource(replay_path, rate=replay_rate, loop=replay_loop)
         
-        if st.button("Analyze"):
+        # Refresh only fetches tweets newer than the current dataset for the same query and source
+        data_key = SinceIdStore.key(source or analyzer.source, query)
+        can_refresh = st.session_state.get('data_key') == data_key and 'trending_tracker' in st.session_state
+        analyze_col, refresh_col = st.columns(2)
+        analyze = analyze_col.button("Analyze")
+        refresh = refresh_col.button("Refresh", disabled=not can_refresh, help="Fetch and score only new tweets")
+        
+        if analyze or refresh:
             with st.spinner("Analyzing tweets and generating ads..."):
-                df = analyzer.fetch_tweets(query, limit)
+                progress = st.progress(0.0, text="Fetching tweets...")
+                trending = st.session_state['trending_tracker'] if refresh else TrendingTopicTracker()
+                
+                def on_page(page, total):
+                    trending.update(tweet['text'] for tweet in page)
+                    progress.progress(min(total / limit, 1.0), text=f"Analyzed {total} tweets")
+                
+                previous = st.session_state['data'] if refresh else None
+                df, new_tweets = analyzer.refresh_tweets(query, previous, limit, on_page=on_page, source=source)
+                if refresh:
+                    st.toast(f"{len(new_tweets)} new tweets")
+                    if new_tweets.attrs.get('truncated'):
+                        st.warning(
+                            f"More than {limit} new tweets arrived; only the newest {limit} were fetched. "
+                            "Raise the limit and refresh again to fill the gap."
+                        )
                 st.session_state['data'] = df
+                st.session_state['data_key'] = data_key
+                st.session_state['trending_tracker'] = trending
+                st.session_state['trending_topics'] = trending.top()
                 
-                sentiment_summary = analyzer.get_sentiment_summary(df)
+                summary = analyzer.summarize(df, st.session_state['trending_topics'], previous=previous)
+                sentiment_summary = summary.as_dict(df)
                 
                 prompt = analyzer.ollama_generator.generate_ad_prompt(
                     company_info,
                     sentiment_summary
                 )
-                ad_content = analyzer.ollama_generator.generate_ad(prompt)
-                st.session_state['ad_content'] = ad_content
+                # The ad copy itself is streamed into the Ad tab once the dashboard renders
+                st.session_state['ad_prompt'] = prompt
+                st.session_state.pop('ad_content', None)
+        
+        st.subheader("Load Exported Data")
+        exported_file = st.file_uploader(
+            "Re-open a CSV/Parquet/Arrow export without refetching",
+            type=['csv', 'parquet', 'arrow', 'feather']
+        )
+        if exported_file is not None and st.button("Load file"):
+            st.session_state['data'] = load_tweets(exported_file)
+            for key in ('trending_topics', 'trending_tracker', 'data_key', 'ad_prompt', 'ad_content', 'export'):
+                st.session_state.pop(key, None)
+        
+        cache_stats = analyzer.sentiment_cache.stats()
+        st.caption(
+            f"Sentiment cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['size']} entries)"
+        )
+        writer_stats = analyzer.writer.stats()
+        st.caption(
+            f"Storage queue: {writer_stats['depth']} pending, {writer_stats['lag']:.1f}s lag, "
+            f"{writer_stats['written']} written, {writer_stats['dead_lettered']} dead-lettered"
+        )
     
     tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "Insights", "Sentiment Analysis", "Damage Control", "AI Ad Suggestions", "Raw Data"
@@ -384,25 +964,28 @@ def main():
     if 'data' in st.session_state:
         df = st.session_state['data']
         
+        summary = analyzer.summarize(df, st.session_state.get('trending_topics'))
+        metrics = summary.metrics
+        
         with tab1:
             st.header("Insights")
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                st.metric("Average Sentiment", f"{df['sentiment_score'].mean():.2f}")
+                st.metric("Average Sentiment", f"{metrics['average_sentiment']:.2f}")
             with col2:
-                st.metric("Positive Tweets", len(df[df['sentiment_category'] == 'positive']))
+                st.metric("Positive Tweets", metrics['positive_count'])
             with col3:
-                st.metric("Negative Tweets", len(df[df['sentiment_category'] == 'negative']))
+                st.metric("Negative Tweets", metrics['negative_count'])
                 
             st.subheader("Engagement Overview")
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Total Retweets", df['retweet_count'].sum())
+                st.metric("Total Retweets", metrics['total_retweets'])
             with col2:
-                st.metric("Total Likes", df['like_count'].sum())
+                st.metric("Total Likes", metrics['total_likes'])
             with col3:
-                st.metric("Total Replies", df['reply_count'].sum())
+                st.metric("Total Replies", metrics['total_replies'])
         
         with tab2:
             st.header("Sentiment Analysis")
@@ -412,7 +995,7 @@ def main():
             
             gauge = go.Figure(go.Indicator(
                 mode = "gauge+number",
-                value = df['sentiment_score'].mean(),
+                value = metrics['average_sentiment'],
                 title = {'text': "Average Sentiment"},
                 gauge = {'axis': {'range': [-1, 1]}}
             ))
@@ -427,35 +1010,81 @@ def main():
         
         with tab3:
             st.header("Damage Control")
-            negative_tweets = df[df['sentiment_category'] == 'negative']
+            top_n = st.number_input("Most engaged negative tweets to review", min_value=1, max_value=1000, value=20, step=5)
+            include_stored = st.checkbox("Include previously stored tweets")
             
-            for _, tweet in negative_tweets.iterrows():
-                with st.expander(f"🚨 Tweet from {tweet['author_id']}"):
-                    st.write(tweet['text'])
-                    st.write(f"Sentiment Score: {tweet['sentiment_score']:.2f}")
-                    st.write(f"Engagement: {tweet['retweet_count']} RTs, {tweet['like_count']} Likes")
+            if include_stored:
+                # Only the top-N rows and the displayed columns are read back from storage
+                negative_tweets = analyzer.db_manager.get_flagged_tweets(
+                    limit=top_n, fields=TweetStore.FLAGGED_FIELDS
+                )
+            else:
+                negative_tweets = df[summary.negative_mask]
+                engagement = negative_tweets[list(TweetStore.ENGAGEMENT_FIELDS)].sum(axis=1)
+                negative_tweets = negative_tweets.loc[engagement.nlargest(top_n).index]
+            
+            if negative_tweets.empty:
+                st.info("No negative tweets to review.")
+            else:
+                tweet_issues = analyzer.analyze_content_issues_batch(negative_tweets['text'])
+            
+                # Keyed on row position as well: a looped replay can repeat tweet ids
+                for position, ((_, tweet), issues) in enumerate(zip(negative_tweets.iterrows(), tweet_issues)):
+                    with st.expander(f"🚨 Tweet from {tweet['author_id']}"):
+                        st.write(tweet['text'])
+                        st.write(f"Sentiment Score: {tweet['sentiment_score']:.2f}")
+                        st.write(f"Engagement: {tweet['retweet_count']} RTs, {tweet['like_count']} Likes")
                     
-                    st.write("Suggested Actions:")
-                    for suggestion in analyzer.generate_damage_control_suggestions(tweet):
-                        st.write(f"- {suggestion}")
+                        st.write("Suggested Actions:")
+                        for suggestion in analyzer.generate_damage_control_suggestions(tweet, issues):
+                            st.write(f"- {suggestion}")
                     
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.button("Respond", key=f"respond_{tweet['id']}")
-                    with col2:
-                        st.button("Monitor", key=f"monitor_{tweet['id']}")
-                    with col3:
-                        st.button("Report", key=f"report_{tweet['id']}")
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            st.button("Respond", key=f"respond_{position}_{tweet['id']}")
+                        with col2:
+                            st.button("Monitor", key=f"monitor_{position}_{tweet['id']}")
+                        with col3:
+                            st.button("Report", key=f"report_{position}_{tweet['id']}")
         
         with tab4:
             st.header("AI-Generated Ad Suggestions")
             
-            if 'ad_content' in st.session_state:
+            if 'ad_prompt' in st.session_state:
                 st.subheader("🎯 Generated Ad Content")
-                st.write(st.session_state['ad_content'])
+                if 'ad_content' not in st.session_state:
+                    stream_stats = {}
+                    try:
+                        st.session_state['ad_content'] = st.write_stream(
+                            analyzer.ollama_generator.generate_ad_stream(st.session_state['ad_prompt'], stream_stats)
+                        )
+                        st.session_state['ad_stream_stats'] = stream_stats
+                    except Exception as e:
+                        print(f"Error generating ad with Ollama: {e}")
+                        st.session_state['ad_content'] = None
+                        st.session_state['ad_stream_stats'] = None
+                        st.error(f"Error generating ad with Ollama: {e}")
+                else:
+                    st.write(st.session_state['ad_content'])
+                
+                stream_stats = st.session_state.get('ad_stream_stats')
+                generation_stats = get_generation_cache().stats()
+                if stream_stats and stream_stats['cached']:
+                    st.caption("Served from the generation cache")
+                elif stream_stats and stream_stats['time_to_first_token'] is not None:
+                    st.caption(
+                        f"First token after {stream_stats['time_to_first_token']:.2f}s, "
+                        f"{stream_stats['tokens_per_second']:.1f} tokens/sec"
+                    )
+                st.caption(
+                    f"Generation cache: {generation_stats['hits']} hits, {generation_stats['misses']} misses "
+                    f"({generation_stats['hit_rate']:.0%} hit rate)"
+                )
                 
                 st.subheader("📊 Data-Driven Ad Ideas")
-                traditional_ads = analyzer.ad_generator.generate_ad_ideas(df)
+                traditional_ads = analyzer.ad_generator.generate_ad_ideas(
+                    df, summary.trending_topics, summary.ad_benefits, summary.ad_pain_points
+                )
                 
                 for i, ad in enumerate(traditional_ads, 1):
                     with st.expander(f"Ad Idea {i}: {ad['type'].replace('_', ' ').title()}"):
@@ -473,13 +1102,21 @@ def main():
             st.header("Raw Data")
             st.dataframe(df)
             
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download CSV",
-                data=csv,
-                file_name="twitter_analysis.csv",
-                mime="text/csv"
-            )
+            # Payloads are only serialized on request, not on every rerun
+            export_format = st.radio("Export format", list(EXPORT_FORMATS), horizontal=True)
+            export = st.session_state.get('export')
+            if st.button("Prepare download"):
+                export = (summary.fingerprint, export_format, export_tweets(df, export_format))
+                st.session_state['export'] = export
+            
+            if export and export[:2] == (summary.fingerprint, export_format):
+                file_name, mime = EXPORT_FORMATS[export_format]
+                st.download_button(
+                    label=f"Download {export_format}",
+                    data=export[2],
+                    file_name=file_name,
+                    mime=mime
+                )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+
+class TokenizedCorpus:
+    """Lowercased whitespace tokens of a set of texts, tokenized once and kept flat.
+
+    Tokens of all texts live in one NumPy array alongside the position of the text
+    they came from, so trigger lookups become vectorized array operations instead of
+    nested Python loops over every word.
+    """
+
+    def __init__(self, texts):
+        texts = texts if isinstance(texts, pd.Series) else pd.Series(list(texts))
+        self.index = texts.index
+        flat = texts.reset_index(drop=True).astype(str).str.lower().str.split().explode().dropna()
+        self.doc_ids = flat.index.to_numpy()
+        self.tokens = flat.to_numpy(dtype=object)
+
+    def _select(self, subset):
+        if subset is None:
+            return self.tokens, self.doc_ids
+        keep = np.isin(self.doc_ids, np.flatnonzero(self.index.isin(subset)))
+        return self.tokens[keep], self.doc_ids[keep]
+
+    def all_tokens(self, subset=None):
+        return self._select(subset)[0]
+
+    def following(self, triggers, n=2, subset=None):
+        """Return the n-1 tokens after each trigger occurrence, in corpus order.
+
+        For n=2 that is the single next word; longer n-grams are joined with spaces.
+        Only n-grams that fit within one text are returned. subset restricts the
+        search to texts with those index labels.
+        """
+        span = n - 1
+        tokens, doc_ids = self._select(subset)
+        if span < 1 or len(tokens) <= span:
+            return []
+
+        is_trigger = np.isin(tokens[:-span], list(triggers))
+        # Doc ids are non-decreasing, so equal ids at both ends mean one text
+        starts = np.flatnonzero(is_trigger & (doc_ids[:-span] == doc_ids[span:]))
+        if span == 1:
+            return tokens[starts + 1].tolist()
+        return [' '.join(tokens[start + 1:start + n]) for start in starts]
@@ -12,6 +12,7 @@ from serpapi import GoogleSearch
 from collections import Counter
 import random
 import requests
+from sentiment_cache import SentimentCache
 
 # Load environment variables
 load_dotenv()
@@ -21,6 +22,7 @@ class SearchAnalyzer:
         self.serpapi_key = os.getenv('SERPAPI_API_KEY', '03c96cdc4bf9e2ecce3ae82c69d2414c7c432d625ce33f3ec2fcea745d772337')
         nltk.download('vader_lexicon', quiet=True)
         self.sia = SentimentIntensityAnalyzer()
+        self.sentiment_cache = SentimentCache(path=os.getenv('SENTIMENT_CACHE_PATH'))
         
     def fetch_data(self, query, limit=100):
         results = []
@@ -91,7 +93,7 @@ class SearchAnalyzer:
         
         return sample_data
     def analyze_sentiment(self, text):
-        return self.sia.polarity_scores(text)
+        return self.sentiment_cache.get_or_score(text, self.sia.polarity_scores)
     
     def get_sentiment_category(self, compound_score):
         if compound_score >= 0.05:
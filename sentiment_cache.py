@@ -0,0 +1,134 @@
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+
+class SentimentCache:
+    """LRU cache of VADER polarity scores keyed on a hash of the normalized text.
+
+    Retweets and copy-pasted tweets hash to the same key, so they are scored once.
+    With a path the scores are also written through to SQLite and survive restarts.
+    """
+
+    FIELDS = ('neg', 'neu', 'pos', 'compound')
+
+    def __init__(self, maxsize=100000, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sentiment "
+                "(key TEXT PRIMARY KEY, neg REAL, neu REAL, pos REAL, compound REAL)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def key(text):
+        # Only whitespace and unicode form are normalized: VADER is case and
+        # punctuation sensitive, so folding those would change the scores.
+        normalized = ' '.join(unicodedata.normalize('NFC', str(text)).split())
+        return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+    def _remember(self, key, scores):
+        self._entries[key] = scores
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _lookup(self, key):
+        with self._lock:
+            scores = self._entries.get(key)
+            if scores is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(scores)
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT neg, neu, pos, compound FROM sentiment WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    scores = dict(zip(self.FIELDS, row))
+                    self._remember(key, scores)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return dict(scores)
+
+            self.misses += 1
+            return None
+
+    def get(self, text):
+        return self._lookup(self.key(text))
+
+    def put_many(self, items):
+        """Store (text, scores) pairs."""
+        rows = []
+        with self._lock:
+            for text, scores in items:
+                key = self.key(text)
+                self._remember(key, dict(scores))
+                rows.append((key,) + tuple(scores[field] for field in self.FIELDS))
+
+            if self._conn is not None and rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO sentiment (key, neg, neu, pos, compound) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.commit()
+
+    def put(self, text, scores):
+        self.put_many([(text, scores)])
+
+    def get_or_score(self, text, score):
+        scores = self.get(text)
+        if scores is None:
+            scores = score(text)
+            self.put(text, scores)
+        return scores
+
+    def score_many(self, texts, score_batch):
+        """Return scores for texts, calling score_batch once with the distinct uncached texts."""
+        keys = [self.key(text) for text in texts]
+        results = {}
+        missing = {}
+        duplicates = 0
+        for key, text in zip(keys, texts):
+            if key in results or key in missing:
+                # Repeats within the batch (retweets) are served without scoring: a hit
+                duplicates += 1
+                continue
+            scores = self._lookup(key)
+            if scores is None:
+                missing[key] = text
+            else:
+                results[key] = scores
+        with self._lock:
+            self.hits += duplicates
+
+        if missing:
+            scored = score_batch(list(missing.values()))
+            self.put_many(zip(missing.values(), scored))
+            results.update(zip(missing.keys(), scored))
+
+        return [dict(results[key]) for key in keys]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._entries),
+            'maxsize': self.maxsize
+        }
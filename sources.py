@@ -0,0 +1,222 @@
+import functools
+import json
+import os
+import threading
+import time
+
+import tweepy
+
+from exports import load_tweets, write_json_atomic
+
+
+@functools.lru_cache(maxsize=None)
+def get_twitter_client():
+    return tweepy.Client(
+        bearer_token=os.getenv('TWITTER_BEARER_TOKEN'),
+        consumer_key=os.getenv('TWITTER_API_KEY'),
+        consumer_secret=os.getenv('TWITTER_API_SECRET'),
+        access_token=os.getenv('TWITTER_ACCESS_TOKEN'),
+        access_token_secret=os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
+    )
+
+
+# Tweet sources yield (records, next_token) pages, where records are unscored tweet
+# dicts with id, text, created_at, author_id and the public metric counts, and
+# next_token resumes the stream after that page (None once it is exhausted).
+# With since_id, only tweets newer than that id are returned.
+
+class TwitterSearchSource:
+    """Live pages from the Twitter API v2 recent search endpoint."""
+
+    SEARCH_ROUTE = "/2/tweets/search/recent"
+    TWEET_FIELDS = ['created_at', 'public_metrics', 'author_id']
+    MAX_PAGE_SIZE = 100
+    MAX_RETRIES = 5
+    name = 'twitter'
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_twitter_client()
+        return self._client
+
+    def pages(self, query, limit=100, page_size=MAX_PAGE_SIZE, next_token=None, since_id=None):
+        fetched = 0
+        response = None
+
+        while fetched < limit:
+            if response is not None:
+                # Only wait out an exhausted rate limit when another request is actually due
+                self._respect_rate_limit(response.headers)
+            params = {
+                'query': query,
+                # The recent search endpoint only accepts 10..100 results per page
+                'max_results': max(10, min(page_size, self.MAX_PAGE_SIZE, limit - fetched)),
+                'tweet.fields': ','.join(self.TWEET_FIELDS)
+            }
+            if next_token:
+                params['next_token'] = next_token
+            if since_id:
+                params['since_id'] = str(since_id)
+
+            response = self._search_page(params)
+            payload = response.json()
+            next_token = payload.get('meta', {}).get('next_token')
+
+            # Pages are never cut to the limit: next_token resumes after the whole page, so
+            # tweets dropped here could never be fetched by a resumed run. Below 10 remaining
+            # tweets this can overshoot the limit by up to 9.
+            records = [self._to_record(tweepy.Tweet(data)) for data in payload.get('data', [])]
+            fetched += len(records)
+            if records:
+                yield records, next_token
+
+            if not next_token:
+                break
+
+    @staticmethod
+    def _to_record(tweet):
+        return {
+            'id': str(tweet.id),
+            'text': tweet.text,
+            'created_at': tweet.created_at.isoformat(),
+            'author_id': str(tweet.author_id),
+            'retweet_count': tweet.public_metrics['retweet_count'],
+            'like_count': tweet.public_metrics['like_count'],
+            'reply_count': tweet.public_metrics['reply_count']
+        }
+
+    def _search_page(self, params):
+        # Client.request returns the raw HTTP response so the rate limit headers stay visible
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                return self.client.request('GET', self.SEARCH_ROUTE, params=params, user_auth=False)
+            except tweepy.TooManyRequests as e:
+                if attempt == self.MAX_RETRIES:
+                    raise
+                self._wait_for_rate_limit_reset(e.response.headers, attempt)
+            except tweepy.TwitterServerError as e:
+                if attempt == self.MAX_RETRIES:
+                    raise
+                delay = min(2 ** attempt, 60)
+                print(f"Twitter server error ({e}), retrying in {delay}s")
+                time.sleep(delay)
+
+    def _respect_rate_limit(self, headers):
+        remaining = headers.get('x-rate-limit-remaining')
+        if remaining is not None and int(remaining) <= 0:
+            self._wait_for_rate_limit_reset(headers)
+
+    def _wait_for_rate_limit_reset(self, headers, attempt=0):
+        reset = headers.get('x-rate-limit-reset')
+        if reset:
+            delay = max(int(reset) - time.time(), 0) + 1
+        else:
+            delay = min(15 * 2 ** attempt, 900)
+        print(f"Twitter rate limit reached, sleeping {delay:.0f}s")
+        time.sleep(delay)
+
+
+class FileReplaySource:
+    """Replays an exported CSV/Parquet/Arrow file as if it were live search results.
+
+    Pages are paced to `rate` tweets/sec (0 for as fast as possible), and with loop
+    the file is replayed from the start until the limit is reached, so small exports
+    can drive large offline benchmarks. Looped passes repeat the file's tweet ids.
+    The query is ignored. next_token is the row offset, so checkpointed runs resume
+    mid-file.
+    """
+
+    RECORD_COLUMNS = ['id', 'text', 'created_at', 'author_id', 'retweet_count', 'like_count', 'reply_count']
+
+    def __init__(self, path, rate=0, loop=False):
+        self.path = path
+        self.rate = rate
+        self.loop = loop
+        self.name = f"replay:{path}"
+        self._records = None
+
+    @property
+    def records(self):
+        if self._records is None:
+            df = load_tweets(self.path)
+            for column in ('retweet_count', 'like_count', 'reply_count'):
+                if column not in df.columns:
+                    df[column] = 0
+            df['id'] = df['id'].astype(str)
+            df['author_id'] = df['author_id'].astype(str)
+            df['created_at'] = df['created_at'].map(lambda timestamp: timestamp.isoformat())
+            self._records = df[self.RECORD_COLUMNS].to_dict('records')
+        return self._records
+
+    def pages(self, query, limit=100, page_size=100, next_token=None, since_id=None):
+        records = self.records
+        if since_id:
+            records = [record for record in records if int(record['id']) > int(since_id)]
+        if not records:
+            return
+
+        offset = int(next_token or 0)
+        emitted = 0
+        started = time.monotonic()
+
+        while emitted < limit:
+            if offset >= len(records):
+                if not self.loop:
+                    break
+                offset = 0
+
+            page = records[offset:offset + min(page_size, limit - emitted)]
+            offset += len(page)
+            emitted += len(page)
+
+            if self.rate:
+                time.sleep(max(started + emitted / self.rate - time.monotonic(), 0))
+
+            exhausted = offset >= len(records) and not self.loop
+            yield [dict(record) for record in page], None if exhausted else str(offset)
+
+
+class SinceIdStore:
+    """Newest tweet id seen per (source, query), kept in a small JSON file.
+
+    Incremental refreshes pass it as since_id so only newer tweets are fetched.
+    """
+
+    def __init__(self, path='since_ids.json'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ids = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._ids = json.load(f)
+
+    @staticmethod
+    def key(source, query):
+        return f"{source.name}:{query}"
+
+    def get(self, key):
+        return self._ids.get(key)
+
+    def update(self, key, tweet_ids):
+        newest = max((int(tweet_id) for tweet_id in tweet_ids), default=None)
+        with self._lock:
+            current = self._ids.get(key)
+            if newest is None or (current is not None and int(current) >= newest):
+                return current
+            self._ids[key] = str(newest)
+            self._save()
+            return self._ids[key]
+
+    def set(self, key, tweet_id):
+        """Pin the id for key, even backwards, e.g. to the start of a gap still to be fetched."""
+        with self._lock:
+            self._ids[key] = str(tweet_id)
+            self._save()
+
+    def _save(self):
+        if self.path:
+            write_json_atomic(self.path, self._ids)
@@ -0,0 +1,165 @@
+import sqlite3
+import threading
+
+import pandas as pd
+
+from storage import TweetStore
+
+COLUMNS = {
+    'id': 'TEXT PRIMARY KEY',
+    'text': 'TEXT',
+    'created_at': 'TEXT',
+    'created_ts': 'REAL',
+    'author_id': 'TEXT',
+    'retweet_count': 'INTEGER',
+    'like_count': 'INTEGER',
+    'reply_count': 'INTEGER',
+    'engagement': 'INTEGER',
+    'sentiment_score': 'REAL',
+    'sentiment_category': 'TEXT',
+    'analysis_timestamp': 'TEXT'
+}
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS tweets_category_created ON tweets (sentiment_category, created_ts)",
+    "CREATE INDEX IF NOT EXISTS tweets_category_engagement ON tweets (sentiment_category, engagement DESC)",
+    "CREATE INDEX IF NOT EXISTS tweets_created ON tweets (created_ts)"
+]
+
+
+class SQLiteTweetStore(TweetStore):
+    """Embedded tweet storage in a local SQLite file, for offline runs and load tests.
+
+    The database runs in WAL mode with one connection per thread, so reads never
+    block the writer. Filters, sorting and aggregates are pushed down into SQL.
+    """
+
+    def __init__(self, path='tweets.db'):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        conn = self._conn()
+        conn.execute(f"CREATE TABLE IF NOT EXISTS tweets ({', '.join(f'{name} {sql_type}' for name, sql_type in COLUMNS.items())})")
+        for statement in INDEXES:
+            conn.execute(statement)
+        conn.commit()
+
+        names = list(COLUMNS)
+        changed = ' OR '.join(f"{field} IS NOT excluded.{field}" for field in self.MUTABLE_FIELDS)
+        # Rows whose mutable fields are unchanged are left alone, so changes() counts real updates
+        self._upsert = (
+            f"INSERT INTO tweets ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+            f"ON CONFLICT(id) DO UPDATE SET "
+            f"{', '.join(f'{field} = excluded.{field}' for field in self.MUTABLE_FIELDS + ('analysis_timestamp',))} "
+            f"WHERE {changed}"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _row(self, tweet):
+        document = self.prepare_document(tweet)
+        return tuple(document.get(name) for name in COLUMNS)
+
+    def save_tweets(self, tweets):
+        """Upsert tweets on id in one transaction.
+
+        Returns {'inserted', 'updated', 'unchanged', 'errors'} like AstraDBManager; if
+        the batch fails, rows are retried one by one so only the bad ones are reported.
+        """
+        rows = list({tweet['id']: self._row(tweet) for tweet in tweets}.values())
+        result = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'errors': []}
+        if not rows:
+            return result
+
+        conn = self._conn()
+        with self._write_lock:
+            existing = set()
+            ids = [row[0] for row in rows]
+            # Stay under SQLite's bound parameter limit
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                existing.update(tweet_id for (tweet_id,) in conn.execute(
+                    f"SELECT id FROM tweets WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+                ))
+
+            try:
+                with conn:
+                    changes = self._write(conn, rows)
+            except sqlite3.Error:
+                changes = 0
+                for row in rows:
+                    try:
+                        with conn:
+                            changes += self._write(conn, [row])
+                    except sqlite3.Error as e:
+                        existing.discard(row[0])
+                        result['errors'].append({'id': row[0], 'error': str(e)})
+
+        failed = {error['id'] for error in result['errors']}
+        result['inserted'] = sum(1 for row in rows if row[0] not in existing and row[0] not in failed)
+        result['updated'] = changes - result['inserted']
+        result['unchanged'] = len(existing) - result['updated']
+
+        if result['errors']:
+            print(f"Error saving {len(result['errors'])} of {len(rows)} tweets")
+        return result
+
+    def _write(self, conn, rows):
+        before = conn.total_changes
+        conn.executemany(self._upsert, rows)
+        return conn.total_changes - before
+
+    def _where(self, query):
+        query = query or self.build_query()
+        clauses = []
+        params = []
+        for clause, value in (
+            ("sentiment_category = ?", query['category']),
+            ("created_ts >= ?", query['since']),
+            ("created_ts < ?", query['until']),
+            ("sentiment_score >= ?", query['min_score']),
+            ("sentiment_score <= ?", query['max_score'])
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def iter_tweets(self, query=None, fields=None, sort=None, page_size=TweetStore.READ_PAGE_SIZE, limit=None):
+        fields = [field for field in (fields or COLUMNS) if field in COLUMNS]
+        where, params = self._where(query)
+        sql = f"SELECT {', '.join(fields)} FROM tweets{where}"
+
+        order = [f"{field} {'DESC' if direction < 0 else 'ASC'}"
+                 for field, direction in (sort or {}).items() if field in COLUMNS]
+        if order:
+            sql += f" ORDER BY {', '.join(order)}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        cursor = self._conn().execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(page_size)
+                if not rows:
+                    break
+                yield pd.DataFrame(rows, columns=fields)
+        finally:
+            cursor.close()
+
+    def aggregate(self, query=None):
+        where, params = self._where(query)
+        return pd.read_sql_query(
+            "SELECT sentiment_category, COUNT(*) AS count, AVG(sentiment_score) AS average_sentiment, "
+            "SUM(retweet_count) AS retweets, SUM(like_count) AS likes, SUM(reply_count) AS replies "
+            f"FROM tweets{where} GROUP BY sentiment_category",
+            self._conn(), params=params, index_col='sentiment_category'
+        )
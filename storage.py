@@ -0,0 +1,110 @@
+from datetime import datetime
+
+import pandas as pd
+
+SENTIMENT_CATEGORIES = ['negative', 'neutral', 'positive']
+
+
+class TweetStore:
+    """Interface shared by the tweet storage backends.
+
+    Backends implement save_tweets and iter_tweets; queries are the backend-neutral
+    dicts returned by build_query. get_db_manager picks the backend from TWEET_STORE
+    (astra, cql or sqlite).
+    """
+
+    # Fields that change between fetches of the same tweet; everything else is immutable
+    MUTABLE_FIELDS = ('retweet_count', 'like_count', 'reply_count', 'engagement', 'sentiment_score', 'sentiment_category')
+    ENGAGEMENT_FIELDS = ('retweet_count', 'like_count', 'reply_count')
+    # Columns the Damage Control view needs; everything else stays in storage
+    FLAGGED_FIELDS = ['id', 'text', 'author_id', 'created_at', 'retweet_count', 'like_count',
+                      'reply_count', 'engagement', 'sentiment_score', 'sentiment_category']
+    AGGREGATE_COLUMNS = ['count', 'average_sentiment', 'retweets', 'likes', 'replies']
+    READ_PAGE_SIZE = 100
+
+    def save_tweet(self, tweet_data):
+        return not self.save_tweets([tweet_data])['errors']
+
+    def save_tweets(self, tweets):
+        """Upsert tweets on id; returns {'inserted': count, 'errors': [{'id', 'error'}], ...}."""
+        raise NotImplementedError
+
+    def iter_tweets(self, query=None, fields=None, sort=None, page_size=READ_PAGE_SIZE, limit=None):
+        """Yield DataFrame chunks of up to page_size stored tweets matching query.
+
+        Only the given fields are read; sort maps field names to 1 or -1.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def prepare_document(cls, tweet):
+        # Derived fields stored alongside the tweet so reads can filter and sort in storage
+        document = dict(tweet)
+        document['engagement'] = sum(int(tweet.get(field) or 0) for field in cls.ENGAGEMENT_FIELDS)
+        if tweet.get('created_at'):
+            document['created_ts'] = cls._timestamp(tweet['created_at'])
+        return document
+
+    @staticmethod
+    def _timestamp(value):
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        if isinstance(value, datetime):
+            return value.timestamp()
+        return float(value)
+
+    def build_query(self, category=None, since=None, until=None, min_score=None, max_score=None):
+        """Filter on a sentiment category, created_at range [since, until) and score bounds.
+
+        since/until take datetimes, ISO strings or epoch seconds.
+        """
+        return {
+            'category': category,
+            'since': self._timestamp(since) if since is not None else None,
+            'until': self._timestamp(until) if until is not None else None,
+            'min_score': float(min_score) if min_score is not None else None,
+            'max_score': float(max_score) if max_score is not None else None
+        }
+
+    def get_flagged_tweets(self, limit=None, fields=None, since=None, until=None, max_score=None,
+                           sort_by_engagement=True, page_size=READ_PAGE_SIZE):
+        """Negative tweets, most engaged first, as one DataFrame.
+
+        Pass limit and fields to load only the top-N worst tweets.
+        """
+        try:
+            chunks = list(self.iter_tweets(
+                self.build_query('negative', since, until, max_score=max_score),
+                fields=fields,
+                sort={'engagement': -1} if sort_by_engagement else None,
+                page_size=page_size,
+                limit=limit
+            ))
+            return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=fields)
+        except Exception as e:
+            print(f"Error retrieving flagged tweets: {e}")
+            return pd.DataFrame()
+
+    def aggregate(self, query=None):
+        """Per sentiment_category count, average sentiment and engagement totals.
+
+        This default streams the few columns it needs chunk by chunk; backends that
+        can group server-side override it.
+        """
+        fields = ['sentiment_category', 'sentiment_score', *self.ENGAGEMENT_FIELDS]
+        partials = [
+            chunk.groupby('sentiment_category').agg(
+                count=('sentiment_score', 'size'),
+                score_sum=('sentiment_score', 'sum'),
+                retweets=('retweet_count', 'sum'),
+                likes=('like_count', 'sum'),
+                replies=('reply_count', 'sum')
+            )
+            for chunk in self.iter_tweets(query, fields=fields, page_size=10000)
+        ]
+        if not partials:
+            return pd.DataFrame(columns=self.AGGREGATE_COLUMNS)
+
+        totals = pd.concat(partials).groupby(level=0).sum()
+        totals['average_sentiment'] = totals.pop('score_sum') / totals['count']
+        return totals[self.AGGREGATE_COLUMNS]
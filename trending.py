@@ -0,0 +1,131 @@
+COMMON_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'is', 'are'}
+
+
+def trending_terms(text):
+    words = (word.lower() for word in str(text).split())
+    return [word for word in words if word not in COMMON_WORDS and len(word) > 3]
+
+
+class SpaceSavingCounter:
+    """Top-k frequency sketch (Space-Saving) with bounded memory.
+
+    At most `capacity` terms are tracked; a new term replaces the current minimum and
+    inherits its count, which bounds the overestimate of any reported count by the
+    smallest tracked count. With capacity=None every term is kept and counts are exact.
+
+    Terms sit in buckets of equal count, linked in count order (the Stream-Summary
+    structure), so adding one occurrence moves a term up a bucket in O(1) and top(k)
+    reads the highest buckets in O(k).
+    """
+
+    def __init__(self, capacity=5000):
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        # count -> terms with that count, in the order they reached it
+        self._buckets = {}
+        # Next lower/higher count that has a bucket (None at either end)
+        self._lower = {}
+        self._higher = {}
+        self._min = None
+        self._max = None
+
+    def _link(self, count, below):
+        # Walk up from the bucket below (or the minimum) to where count belongs
+        if below is None and self._min is not None and self._min < count:
+            below = self._min
+        if below is None:
+            lower, higher = None, self._min
+        else:
+            while self._higher[below] is not None and self._higher[below] < count:
+                below = self._higher[below]
+            lower, higher = below, self._higher[below]
+
+        self._buckets[count] = {}
+        self._lower[count], self._higher[count] = lower, higher
+        if lower is None:
+            self._min = count
+        else:
+            self._higher[lower] = count
+        if higher is None:
+            self._max = count
+        else:
+            self._lower[higher] = count
+
+    def _unlink(self, count):
+        lower, higher = self._lower.pop(count), self._higher.pop(count)
+        del self._buckets[count]
+        if lower is None:
+            self._min = higher
+        else:
+            self._higher[lower] = higher
+        if higher is None:
+            self._max = lower
+        else:
+            self._lower[higher] = lower
+
+    def _place(self, term, count, below=None):
+        if count not in self._buckets:
+            self._link(count, below)
+        self._buckets[count][term] = None
+        self.counts[term] = count
+
+    def _unplace(self, term, count):
+        bucket = self._buckets[count]
+        del bucket[term]
+        if not bucket:
+            self._unlink(count)
+
+    def add(self, term, count=1):
+        if count <= 0:
+            return
+        self.total += count
+        if term in self.counts:
+            current = self.counts[term]
+            self._place(term, current + count, below=current)
+            self._unplace(term, current)
+        elif self.capacity is None or len(self.counts) < self.capacity:
+            self._place(term, count)
+        else:
+            floor = self._min
+            evicted = next(iter(self._buckets[floor]))
+            del self.counts[evicted]
+            self.errors.pop(evicted, None)
+            self._place(term, floor + count, below=floor)
+            self.errors[term] = floor
+            self._unplace(evicted, floor)
+
+    def update(self, terms):
+        for term in terms:
+            self.add(term)
+
+    def top(self, n=5):
+        """Return the n most frequent (term, count) pairs, ties in the order they reached that count."""
+        top = []
+        count = self._max
+        while count is not None and len(top) < n:
+            for term in self._buckets[count]:
+                if len(top) == n:
+                    break
+                top.append((term, count))
+            count = self._lower[count]
+        return top
+
+
+class TrendingTopicTracker:
+    """Incremental trending-topic counter, updated one page of tweets at a time."""
+
+    def __init__(self, capacity=5000):
+        self.counter = SpaceSavingCounter(capacity)
+
+    def update(self, texts):
+        for text in texts:
+            self.counter.update(trending_terms(text))
+
+    def update_tokens(self, tokens):
+        """Count already lowercased tokens, e.g. from a TokenizedCorpus."""
+        self.counter.update(token for token in tokens if token not in COMMON_WORDS and len(token) > 3)
+
+    def top(self, n=5):
+        return [term for term, _ in self.counter.top(n)]
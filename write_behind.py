@@ -0,0 +1,157 @@
+import atexit
+import json
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+
+
+class WriteBehindQueue:
+    """Persist tweets to a TweetStore on a background thread.
+
+    submit() only enqueues, so callers return as soon as tweets are scored. The
+    writer drains the bounded queue in batches, retries failed tweets with jittered
+    exponential backoff and appends tweets that still fail to a JSONL dead-letter
+    file. Pending writes are flushed at interpreter exit. A batch that fails in an
+    unexpected way (e.g. the dead-letter file is unwritable) is logged and dropped so
+    the writer keeps draining the queue.
+    """
+
+    def __init__(self, store, maxsize=10000, batch_size=100, flush_interval=0.5,
+                 max_retries=5, backoff=0.5, dead_letter_path='dead_letter.jsonl'):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.dead_letter_path = dead_letter_path
+
+        self.written = 0
+        self.dead_lettered = 0
+        self.retries = 0
+        self.batches = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._in_flight_since = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, tweets):
+        """Queue tweets for writing; blocks only while the queue is full (backpressure)."""
+        if self._closed:
+            raise RuntimeError("write-behind queue is closed")
+        enqueued_at = time.monotonic()
+        for tweet in tweets:
+            while True:
+                # Re-check the writer while blocked, so a dead writer can't hang the caller
+                if not self._thread.is_alive():
+                    raise RuntimeError("write-behind writer thread is not running")
+                try:
+                    self._queue.put((enqueued_at, tweet), timeout=1)
+                    break
+                except queue.Full:
+                    continue
+
+    def flush(self):
+        """Block until every tweet submitted so far is written or dead-lettered."""
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if not self._thread.is_alive():
+                    raise RuntimeError("write-behind writer thread is not running")
+                self._queue.all_tasks_done.wait(1)
+
+    def close(self, timeout=30):
+        if self._closed:
+            return
+        self._closed = True
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            print("Write-behind: queue still full at shutdown, pending tweets were not written")
+            return
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._queue.mutex:
+            oldest = self._queue.queue[0][0] if self._queue.queue and self._queue.queue[0] else None
+        if self._in_flight_since is not None:
+            oldest = self._in_flight_since if oldest is None else min(oldest, self._in_flight_since)
+        return {
+            'depth': self._queue.qsize(),
+            # Age of the oldest tweet not yet persisted
+            'lag': time.monotonic() - oldest if oldest is not None else 0.0,
+            'written': self.written,
+            'dead_lettered': self.dead_lettered,
+            'retries': self.retries,
+            'batches': self.batches,
+            'dropped': self.dropped
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._in_flight_since = batch[0][0]
+            try:
+                self._write([tweet for _, tweet in batch])
+            except Exception as e:
+                self.dropped += len(batch)
+                print(f"Write-behind: dropped a batch of {len(batch)} tweets: {e}")
+            finally:
+                self._in_flight_since = None
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, tweets):
+        self.batches += 1
+        pending = tweets
+        errors = {}
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retries += 1
+                time.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+            try:
+                result = self.store.save_tweets(pending)
+            except Exception as e:
+                errors = {tweet['id']: str(e) for tweet in pending}
+                continue
+
+            errors = {error['id']: error['error'] for error in result['errors']}
+            self.written += len(pending) - len(errors)
+            pending = [tweet for tweet in pending if tweet['id'] in errors]
+            if not pending:
+                return
+
+        self._dead_letter(pending, errors)
+
+    def _dead_letter(self, tweets, errors):
+        failed_at = datetime.utcnow().isoformat()
+        with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+            for tweet in tweets:
+                f.write(json.dumps({'tweet': tweet, 'error': errors.get(tweet['id']), 'failed_at': failed_at},
+                                   default=str) + '\n')
+        self.dead_lettered += len(tweets)
+        print(f"Write-behind: {len(tweets)} tweets failed permanently, see {self.dead_letter_path}")